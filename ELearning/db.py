@@ -0,0 +1,80 @@
+"""
+DATABASES['default'] from DATABASE_URL, with connection management from the environment.
+
+DB_CONN_MAX_AGE        Seconds a connection is kept for later requests; 0 closes it after
+                       each request, None keeps it until it fails (default 60).
+DB_CONN_HEALTH_CHECKS  Check a kept connection before a request reuses it (default True).
+DB_POOL                'True' for a psycopg 3 connection pool (PostgreSQL only; needs
+                       psycopg-pool). The pool replaces persistent connections, and is the
+                       option to use under ASGI, where each request gets its own thread.
+DB_POOL_MIN_SIZE       Connections the pool keeps open (default 2).
+DB_POOL_MAX_SIZE       Connections the pool opens at most (default 10).
+DB_POOL_TIMEOUT        Seconds a request waits for a free pooled connection (default 10).
+DB_STATEMENT_TIMEOUT   Milliseconds before PostgreSQL cancels a statement (default 0, off).
+DB_CONNECT_TIMEOUT     Seconds to wait when opening a connection (default 10).
+
+Query parameters of the URL (e.g. ?sslmode=require) are passed on as connection options.
+
+Read replicas are listed in DATABASE_REPLICA_URLS (comma-separated, same options as
+above), with optional DATABASE_REPLICA_WEIGHTS (comma-separated, default 1 each); see
+ELearning/replicas.py for how reads are routed to them.
+"""
+import os
+from urllib.parse import parse_qsl, unquote, urlparse
+from django.core.exceptions import ImproperlyConfigured
+
+
+def _conn_max_age(value):
+    return None if value == 'None' else int(value)
+
+
+def database_config(url, sqlite_name=None, environ=None):
+    """The settings dict of a database URL (postgres:// or sqlite:///path)."""
+    environ = os.environ if environ is None else environ
+    parsed = urlparse(url)
+    pool = environ.get('DB_POOL') == 'True'
+    common = {
+        'CONN_MAX_AGE': 0 if pool else _conn_max_age(environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+    }
+
+    if parsed.scheme == 'sqlite':
+        if pool:
+            raise ImproperlyConfigured("DB_POOL needs a PostgreSQL DATABASE_URL.")
+        # Local runs and benchmarks, e.g. DATABASE_URL=sqlite:///db.sqlite3
+        return {'ENGINE': 'django.db.backends.sqlite3', 'NAME': parsed.path[1:] or sqlite_name, **common}
+
+    options = dict(parse_qsl(parsed.query))
+    options['connect_timeout'] = int(environ.get('DB_CONNECT_TIMEOUT', 10))
+    statement_timeout = int(environ.get('DB_STATEMENT_TIMEOUT', 0))
+    if statement_timeout:
+        options['options'] = f"{options.get('options', '')} -c statement_timeout={statement_timeout}".strip()
+    if pool:
+        options['pool'] = {
+            'min_size': int(environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': unquote(parsed.path.lstrip('/')),
+        'USER': unquote(parsed.username) if parsed.username else parsed.username,
+        'PASSWORD': unquote(parsed.password) if parsed.password else parsed.password,
+        'HOST': parsed.hostname,
+        'PORT': parsed.port or 5432,
+        'OPTIONS': options,
+        **common,
+    }
+
+
+def replica_databases(urls, weights='', environ=None):
+    """({alias: settings dict}, {alias: weight}) for comma-separated replica URLs and weights."""
+    urls = [url for url in urls.split(',') if url]
+    weights = [int(weight) for weight in weights.split(',') if weight] or [1] * len(urls)
+    if len(weights) != len(urls):
+        raise ImproperlyConfigured("DATABASE_REPLICA_WEIGHTS needs one weight per replica URL.")
+    aliases = [f'replica_{index}' for index in range(1, len(urls) + 1)]
+    # Tests read replicas through the test database of `default`
+    databases = {alias: {**database_config(url, environ=environ), 'TEST': {'MIRROR': 'default'}}
+                 for alias, url in zip(aliases, urls)}
+    return databases, dict(zip(aliases, weights))
@@ -0,0 +1,196 @@
+"""
+Per-request cost instrumentation.
+
+RequestMetricsMiddleware records, for every request, the number of SQL queries and
+the time spent in them, the time spent rendering the response (DRF encoding the view's
+data as JSON; serializer work runs inside the view and is part of the total), the
+total time and the response size. The numbers are handed to the sink configured in
+REQUEST_METRICS and checked against optional per-route budgets keyed by URL name.
+They are also returned in a `Server-Timing` header, but only with SERVER_TIMING on,
+in DEBUG or to staff, since query counts and timings help an attacker.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+@dataclass
+class RequestMetrics:
+    route: str = None
+    method: str = None
+    status: int = None
+    queries: int = 0
+    db_ms: float = 0.0
+    render_ms: float = 0.0
+    total_ms: float = 0.0
+    bytes: int = None
+    _render_started: float = field(default=None, repr=False)
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+
+    def as_dict(self):
+        return {key: value for key, value in asdict(self).items() if not key.startswith('_')}
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_ms:.2f};desc="{self.queries} queries"',
+            f'render;dur={self.render_ms:.2f}',
+            f'total;dur={self.total_ms:.2f}',
+        ])
+
+
+class LogSink:
+    """Writes one JSON line per request to the `ELearning.metrics` logger."""
+
+    def emit(self, metrics):
+        logger.info(json.dumps(metrics.as_dict()))
+
+
+class RingBufferSink:
+    """Keeps the most recent REQUEST_METRICS['RING_BUFFER_SIZE'] requests in memory."""
+
+    def __init__(self):
+        self.records = deque(maxlen=get_config().get('RING_BUFFER_SIZE', 1000))
+        self._lock = threading.Lock()
+
+    def emit(self, metrics):
+        with self._lock:
+            self.records.append(metrics.as_dict())
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.records)
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+
+_sinks = {}
+_sinks_lock = threading.Lock()
+
+
+def get_config():
+    return getattr(settings, 'REQUEST_METRICS', {})
+
+
+def get_sink():
+    """The configured sink instance (one per sink class in this process), or None."""
+    path = get_config().get('SINK')
+    if not path:
+        return None
+    with _sinks_lock:
+        if path not in _sinks:
+            _sinks[path] = import_string(path)()
+        return _sinks[path]
+
+
+def check_budget(metrics):
+    """Return a description of every budget the request went over."""
+    budget = get_config().get('BUDGETS', {}).get(metrics.route) or {}
+    values = metrics.as_dict()
+    return [
+        f"{name} {values[name]} > {limit}"
+        for name, limit in budget.items()
+        if values.get(name) is not None and values[name] > limit
+    ]
+
+
+class RequestMetricsMiddleware:
+    """
+    Sync and async capable, so an ASGI stack with async views stays async. Database
+    connections are per thread, so in async mode the query wrappers are installed on
+    the thread that runs the request's ORM calls (Django gives each ASGI request one).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, started = self._start(request)
+        with self._record_queries(metrics):
+            response = self.get_response(request)
+        return self._finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics, started = self._start(request)
+        recording = await sync_to_async(self._record_queries)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.close)()
+        return self._finish(request, response, metrics, started)
+
+    def _start(self, request):
+        metrics = RequestMetrics(method=request.method)
+        request.request_metrics = metrics
+        return metrics, time.perf_counter()
+
+    def _record_queries(self, metrics):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics.record_query))
+        return stack
+
+    def _finish(self, request, response, metrics, started):
+        metrics.total_ms = (time.perf_counter() - started) * 1000
+        metrics.status = response.status_code
+        if request.resolver_match:
+            metrics.route = request.resolver_match.url_name or request.resolver_match.route
+        if not response.streaming:
+            metrics.bytes = len(response.content)
+        if self._show_timing(request):
+            response['Server-Timing'] = metrics.server_timing()
+
+        sink = get_sink()
+        if sink:
+            sink.emit(metrics)
+
+        exceeded = check_budget(metrics)
+        if exceeded:
+            message = f"{metrics.method} {metrics.route} over budget: {', '.join(exceeded)}"
+            if get_config().get('ENFORCE_BUDGETS'):
+                raise BudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def _show_timing(self, request):
+        # DRF sets the authenticated user on the underlying request as well
+        user = getattr(request, 'user', None)
+        return get_config().get('SERVER_TIMING') or settings.DEBUG or bool(getattr(user, 'is_staff', False))
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that step
+        metrics = request.request_metrics
+        metrics._render_started = time.perf_counter()
+
+        def finish(response):
+            metrics.render_ms += (time.perf_counter() - metrics._render_started) * 1000
+        response.add_post_render_callback(finish)
+        return response
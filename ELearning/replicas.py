@@ -0,0 +1,155 @@
+"""
+Read replicas (DATABASE_REPLICA_URLS; see ELearning/db.py).
+
+ReplicaMiddleware picks one replica per GET/HEAD request, weighted round-robin by
+DATABASE_REPLICAS, and ReplicaRouter sends that request's reads to it. Everything
+else reads from `default`: other methods, code outside requests (commands, background
+flushers), reads inside a transaction and cache builds (see primary()), so a payload
+cached under a fresh version is never built from a lagging replica.
+
+After a successful write request, its author reads from `default` for
+REPLICA_PIN_SECONDS, so they see their own writes (a saved resume position, a new
+enrollment) while the replicas catch up. The author is the user ID of the bearer
+token, or the session; pins are kept in the cache, which must be shared between
+processes for them to hold across workers.
+"""
+import hashlib
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Alias the current request reads from; None reads from `default`
+_read_alias = ContextVar('read_alias', default=None)
+
+
+class WeightedRoundRobin:
+    """Smooth weighted round-robin: weights 2 and 1 give a, b, a, a, b, a, ..."""
+
+    def __init__(self, weights):
+        self.weights = dict(weights)
+        self.current = dict.fromkeys(self.weights, 0)
+        self.total = sum(self.weights.values())
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            for alias, weight in self.weights.items():
+                self.current[alias] += weight
+            alias = max(self.current, key=self.current.get)
+            self.current[alias] -= self.total
+            return alias
+
+
+_balancers = {}
+_balancers_lock = threading.Lock()
+
+
+def next_replica():
+    """The replica the next request should read from, or None without replicas."""
+    weights = settings.DATABASE_REPLICAS
+    if not weights:
+        return None
+    key = tuple(weights.items())
+    with _balancers_lock:
+        if key not in _balancers:
+            _balancers[key] = WeightedRoundRobin(weights)
+        balancer = _balancers[key]
+    return balancer.next()
+
+
+@contextmanager
+def primary():
+    """Read from `default` within the block."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def _pin_key(subject):
+    return f"replicas:pinned:{hashlib.md5(subject.encode()).hexdigest()}"
+
+
+def request_subject(request):
+    """Whose writes a request makes: the bearer token's user, else the session; None if anonymous."""
+    from authentication.authentication import ClaimsJWTAuthentication
+    from rest_framework.exceptions import AuthenticationFailed
+
+    try:
+        authenticated = ClaimsJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        authenticated = None
+    if authenticated:
+        return f"user:{authenticated[0].id}"
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    return f"session:{session_key}" if session_key else None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as `default`
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        subject = request_subject(request)
+        pinned = subject is not None and cache.get(_pin_key(subject))
+        token = _read_alias.set(next_replica() if request.method in SAFE_METHODS and not pinned else None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if self._wrote(request, response, subject):
+            cache.set(_pin_key(subject), True, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        subject = request_subject(request)
+        pinned = subject is not None and await cache.aget(_pin_key(subject))
+        token = _read_alias.set(next_replica() if request.method in SAFE_METHODS and not pinned else None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if self._wrote(request, response, subject):
+            await cache.aset(_pin_key(subject), True, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def _wrote(self, request, response, subject):
+        return subject is not None and request.method not in SAFE_METHODS and response.status_code < 400
@@ -1,8 +1,9 @@
 from pathlib import Path
 from datetime import timedelta
 import os
+import sys
 from dotenv import load_dotenv
-from urllib.parse import urlparse
+from ELearning.db import database_config, replica_databases
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,6 +20,9 @@ SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv('DJANGO_DEBUG') == 'True'
 
+# `manage.py test` runs in one process, so per-process caches are fine there
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = os.getenv('DJANGO_ALLOWED_HOSTS').split(',')
 
 # Application definition
@@ -36,11 +40,16 @@ INSTALLED_APPS = [
     'corsheaders',
     'authentication',
     'courses',
+    'benchmarks',
 ]
 
+# Stateless JWT auth builds request.user from the token claims instead of loading
+# the user row on every request; set JWT_STATELESS_AUTH=False to go back to lookups.
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.ClaimsJWTAuthentication'
+        if os.getenv('JWT_STATELESS_AUTH', 'True') == 'True'
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     )
 }
 
@@ -84,6 +93,8 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'ELearning.metrics.RequestMetricsMiddleware',
+    'ELearning.replicas.ReplicaMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -94,6 +105,37 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request query count, DB/render time and size (sink, and Server-Timing header when
+# SERVER_TIMING is on, in DEBUG or for staff).
+# BUDGETS are keyed by URL name; ENFORCE_BUDGETS raises instead of logging a warning.
+# Budgets assume a cold cache; the ETag-backed endpoints spend one query on their validators.
+REQUEST_METRICS = {
+    'SINK': os.getenv('REQUEST_METRICS_SINK', 'ELearning.metrics.LogSink'),
+    'RING_BUFFER_SIZE': int(os.getenv('REQUEST_METRICS_RING_BUFFER_SIZE', 1000)),
+    'ENFORCE_BUDGETS': os.getenv('REQUEST_METRICS_ENFORCE_BUDGETS') == 'True',
+    'SERVER_TIMING': os.getenv('REQUEST_METRICS_SERVER_TIMING') == 'True',
+    'BUDGETS': {
+        'list_courses': {'queries': 2},
+        'list_courses_with_enrollment_status': {'queries': 1},
+        'enrolled_list_courses': {'queries': 2},
+        'search_courses': {'queries': 2},
+        'search_videos': {'queries': 2},
+        'get_course_details': {'queries': 3},
+        'get_course_videos': {'queries': 3},
+        'get_course_progress': {'queries': 1},
+        'get_course_online_users': {'queries': 2},
+        'get_dashboard': {'queries': 1},
+        'get_last_watched': {'queries': 2},
+        'get_course_watch_history': {'queries': 4},
+        'get_video': {'queries': 3},
+        'get_video_watch_history': {'queries': 3},
+        'async_get_last_watched': {'queries': 2},
+        'async_get_video_watch_history': {'queries': 3},
+        'user_profile': {'queries': 1},
+        'update_user_status': {'queries': 0},
+        'check_user_online_status': {'queries': 0},
+    },
+}
 
 ROOT_URLCONF = 'ELearning.urls'
 
@@ -119,19 +161,41 @@ WSGI_APPLICATION = 'ELearning.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-tmpPostgres = urlparse(os.getenv("DATABASE_URL"))
-
+# Connection lifetime, pooling, health checks and timeouts: see ELearning/db.py
 DATABASES = {
+    'default': database_config(os.getenv('DATABASE_URL'), sqlite_name=BASE_DIR / 'db.sqlite3'),
+}
+
+# GET requests read from these replicas (weighted round-robin); a user who just wrote
+# reads from `default` for REPLICA_PIN_SECONDS. See ELearning/replicas.py
+_replicas, DATABASE_REPLICAS = replica_databases(os.getenv('DATABASE_REPLICA_URLS', ''),
+                                                 os.getenv('DATABASE_REPLICA_WEIGHTS', ''))
+DATABASES.update(_replicas)
+DATABASE_ROUTERS = ['ELearning.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Local memory unless a shared backend is configured, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://127.0.0.1:6379
+# Invalidation only reaches other processes through a shared backend, so one is
+# mandatory for multi-process deployments (see the courses.W001 system check).
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': tmpPostgres.path.replace('/', ''),
-        'USER': tmpPostgres.username,
-        'PASSWORD': tmpPostgres.password,
-        'HOST': tmpPostgres.hostname,
-        'PORT': 5432,
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+# Seconds a serialized course/video payload stays cached (entries are also invalidated on write); 0 turns it off
+COURSES_CACHE_TIMEOUT = int(os.getenv('COURSES_CACHE_TIMEOUT', 60 * 60))
+
+# Cache each user's enrolled-course set for the enrollment checks. A stale set grants or
+# denies access, so outside DEBUG and tests it is only cached in a shared CACHE_BACKEND;
+# with the local-memory cache the checks query the database (courses.W002 warns)
+COURSES_ENROLLMENT_CACHE = os.getenv('COURSES_ENROLLMENT_CACHE', 'True') == 'True'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -169,7 +233,7 @@ USE_TZ = True
 
 STATIC_URL = os.getenv('STATIC_URL', 'static/')
 
-# MEDIA_URL = '/media/'
+MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
 MEDIA_ROOT = os.getenv('MEDIA_ROOT', BASE_DIR / 'media')
 
 # Default primary key field type
@@ -178,4 +242,60 @@ MEDIA_ROOT = os.getenv('MEDIA_ROOT', BASE_DIR / 'media')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Watch-progress heartbeats are buffered per process and written in bulk
+WATCH_HISTORY_FLUSH_INTERVAL = float(os.getenv('WATCH_HISTORY_FLUSH_INTERVAL', 5))
+WATCH_HISTORY_FLUSH_SIZE = int(os.getenv('WATCH_HISTORY_FLUSH_SIZE', 500))
+WATCH_HISTORY_BATCH_MAX = int(os.getenv('WATCH_HISTORY_BATCH_MAX', 100))
+
+# Keyset pagination for the course list endpoints (opt-in per request)
+COURSES_PAGE_SIZE = int(os.getenv('COURSES_PAGE_SIZE', 20))
+COURSES_MAX_PAGE_SIZE = int(os.getenv('COURSES_MAX_PAGE_SIZE', 100))
+
+# Serve the large course/video/watch-history lists from values() rows instead of
+# ModelSerializer instances (same JSON, byte for byte)
+COURSES_FAST_JSON = os.getenv('COURSES_FAST_JSON', 'False') == 'True'
+
+# Rows fetched per round trip (server-side cursor) by the streaming exports
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+# Export watermarks trail the clock so rows of still-open transactions aren't skipped;
+# keep it above the longest write transaction (seconds)
+EXPORT_WATERMARK_LAG = float(os.getenv('EXPORT_WATERMARK_LAG', 60))
+
+# Uploaded videos are probed (duration, poster frame) by a per-process thread pool
+VIDEO_INGESTION_WORKERS = int(os.getenv('VIDEO_INGESTION_WORKERS', 2))
+# Jobs 'processing' for longer than this (seconds) are requeued by process_ingestion_jobs
+VIDEO_INGESTION_STALE_AFTER = int(os.getenv('VIDEO_INGESTION_STALE_AFTER', 30 * 60))
+
+# HLS packaging of ingested videos; renditions taller than the source are skipped
+VIDEO_HLS_ENABLED = os.getenv('VIDEO_HLS_ENABLED', 'True') == 'True'
+VIDEO_HLS_SEGMENT_SECONDS = int(os.getenv('VIDEO_HLS_SEGMENT_SECONDS', 6))
+VIDEO_HLS_RENDITIONS = [
+    {'name': '360p', 'height': 360, 'video_bitrate': 800, 'audio_bitrate': 96},
+    {'name': '720p', 'height': 720, 'video_bitrate': 2800, 'audio_bitrate': 128},
+    {'name': '1080p', 'height': 1080, 'video_bitrate': 5000, 'audio_bitrate': 192},
+]
+
+# Scrub previews: one thumbnail (this wide, in px) every interval seconds, packed into
+# sprite sheets of columns x rows tiles
+VIDEO_THUMBNAIL_INTERVAL = int(os.getenv('VIDEO_THUMBNAIL_INTERVAL', 10))
+VIDEO_THUMBNAIL_WIDTH = int(os.getenv('VIDEO_THUMBNAIL_WIDTH', 160))
+VIDEO_SPRITE_COLUMNS = int(os.getenv('VIDEO_SPRITE_COLUMNS', 10))
+VIDEO_SPRITE_ROWS = int(os.getenv('VIDEO_SPRITE_ROWS', 10))
+
+# Media delivery: browser cache lifetime, and the nginx internal location mapped to
+# MEDIA_ROOT (e.g. '/protected-media/') to hand files off via X-Accel-Redirect
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 60 * 60))
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '')
+
+# Resumable uploads: default and largest accepted chunk, in bytes
+VIDEO_UPLOAD_CHUNK_SIZE = int(os.getenv('VIDEO_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+VIDEO_UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('VIDEO_UPLOAD_MAX_CHUNK_SIZE', 64 * 1024 * 1024))
+
+# Online status lives in the cache and expires PRESENCE_TTL seconds after the last
+# heartbeat; UserProfile.is_online is synced in bulk every PRESENCE_FLUSH_INTERVAL.
+# Needs a shared CACHE_BACKEND with several processes, or each worker only sees its own heartbeats
+PRESENCE_TTL = int(os.getenv('PRESENCE_TTL', 60))
+PRESENCE_FLUSH_INTERVAL = float(os.getenv('PRESENCE_FLUSH_INTERVAL', 30))
+
+
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS').split(',')
\ No newline at end of file
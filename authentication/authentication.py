@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .models import UserProfile
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user built from the verified access token: `id`, `username`, `email`,
+    `role` and `is_staff` come from its claims. `user` and `profile` load the
+    database rows on first access, for the views that need more than identity and role.
+    """
+
+    @cached_property
+    def role(self):
+        # Tokens issued before the role claim was added fall back to the profile
+        return self.token.get('role') or self.profile.role
+
+    @cached_property
+    def email(self):
+        return self.token.get('email') or self.user.email
+
+    @cached_property
+    def user(self):
+        return User.objects.get(id=self.id)
+
+    @cached_property
+    def profile(self):
+        return UserProfile.objects.select_related('user').get(user_id=self.id)
+
+    def __str__(self):
+        return self.username or f"ClaimsUser {self.id}"
+
+
+def get_role(user):
+    """Role of the request user, from the token claims when authenticated statelessly."""
+    return user.role if isinstance(user, ClaimsUser) else user.userprofile.role
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication without a query per request: the user is a ClaimsUser backed
+    by the token instead of the `auth_user` row. Deactivating a user therefore only
+    takes effect once their access token expires.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return ClaimsUser(validated_token)
+
+
+class QueryParamJWTAuthentication(ClaimsJWTAuthentication):
+    """
+    Reads the access token from the `access_token` query parameter, for clients that
+    cannot set headers (e.g. a <video> element fetching a media URL).
+    """
+
+    def authenticate(self, request):
+        raw_token = request.query_params.get('access_token')
+        if not raw_token:
+            return None
+        validated_token = self.get_validated_token(raw_token.encode())
+        return self.get_user(validated_token), validated_token
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from authentication.presence import presence
+
+
+class Command(BaseCommand):
+    help = "Sync UserProfile.is_online with the presence cache, turning users with expired heartbeats offline."
+
+    def handle(self, *args, **options):
+        updated = presence.flush()
+        self.stdout.write(self.style.SUCCESS(f"Updated online status of {updated} profiles."))
@@ -0,0 +1,119 @@
+import atexit
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, close_old_connections
+from courses.checks import cache_is_shared, single_process
+from .models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+
+def _key(user_id):
+    return f"presence:{user_id}"
+
+
+class PresenceTracker:
+    """
+    Online status kept in the cache: a heartbeat stores a key that expires after
+    PRESENCE_TTL seconds, so users go offline on their own when heartbeats stop.
+
+    UserProfile.is_online is only a persisted copy. Status changes are collected in
+    process memory and written with a couple of bulk UPDATEs every
+    PRESENCE_FLUSH_INTERVAL seconds (0 disables the background thread), at
+    interpreter exit and by the flush_presence command; each flush also turns
+    expired users offline.
+
+    Heartbeats must land in a shared cache: with a per-process one, a worker only
+    sees the heartbeats it received itself, so it reports everyone else offline and
+    its expiry pass would flip their stored flag. Expiry is therefore skipped on a
+    per-process cache outside DEBUG and tests.
+    """
+
+    def __init__(self):
+        self._changed = set()
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def heartbeat(self, user_id, online=True):
+        if online:
+            cache.set(_key(user_id), time.time(), timeout=settings.PRESENCE_TTL)
+        else:
+            cache.delete(_key(user_id))
+        with self._lock:
+            self._changed.add(user_id)
+        self._start_flusher()
+
+    def is_online(self, user_id):
+        return cache.get(_key(user_id)) is not None
+
+    def online_among(self, user_ids):
+        """The subset of `user_ids` that is online, with a single cache round trip."""
+        user_ids = list(user_ids)
+        found = cache.get_many([_key(user_id) for user_id in user_ids])
+        return {user_id for user_id in user_ids if _key(user_id) in found}
+
+    def flush(self, expire=True):
+        """
+        Persist the cache state to UserProfile.is_online for users whose status changed
+        and, with `expire`, for every user stored as online; returns the number of
+        profiles updated.
+        """
+        if expire and not cache_is_shared() and not single_process():
+            logger.warning("Skipping presence expiry: the cache is per-process, so expired heartbeats can't be told "
+                           "apart from heartbeats sent to another worker.")
+            expire = False
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        if not changed and not expire:
+            return 0
+        try:
+            candidates = set(changed)
+            if expire:
+                candidates |= set(UserProfile.objects.filter(is_online=True).values_list('user_id', flat=True))
+            if not candidates:
+                return 0
+            online = self.online_among(candidates)
+            updated = UserProfile.objects.filter(user_id__in=online, is_online=False).update(is_online=True)
+            updated += UserProfile.objects.filter(user_id__in=candidates - online, is_online=True).update(is_online=False)
+        except Exception:
+            with self._lock:
+                self._changed |= changed
+            raise
+        return updated
+
+    def _start_flusher(self):
+        interval = settings.PRESENCE_FLUSH_INTERVAL
+        if self._flusher is not None or interval <= 0:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, args=(interval,), daemon=True)
+                self._flusher.start()
+
+    def _run_flusher(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush presence")
+            finally:
+                close_old_connections()
+
+
+def _flush_at_exit():
+    """Persist the last status changes on shutdown, unless the database is gone (e.g. a test database)."""
+    try:
+        presence.flush(expire=False)
+    except DatabaseError:
+        logger.warning("Skipped the presence flush at exit: the database is unavailable.", exc_info=True)
+
+
+presence = PresenceTracker()
+# Not under the test runner: the test database is gone by then, and DATABASES would
+# point at the real one
+if not settings.TESTING:
+    atexit.register(_flush_at_exit)
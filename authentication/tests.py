@@ -0,0 +1,136 @@
+import io
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from .authentication import ClaimsUser
+from .models import UserProfile
+from . import presence as presence_module
+from .presence import presence
+from .views import LoginTokenObtainPairSerializer
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='teacher', email='teacher@example.com', password='password')
+        self.profile = UserProfile.objects.create(user=self.user, role='teacher')
+        self.token = LoginTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_profile_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/authentication/user/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], 'teacher')
+        self.assertEqual(response.data['role'], 'teacher')
+
+
+    def test_claims_user(self):
+        user = ClaimsUser(self.token)
+        with self.assertNumQueries(0):
+            self.assertEqual((user.id, user.username, user.role, user.is_staff), (self.user.id, 'teacher', 'teacher', False))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.profile, self.profile)
+            self.assertEqual(user.profile.user.email, 'teacher@example.com')
+
+    def test_staff_claim(self):
+        self.assertEqual(self.client.get('/api/courses/cache/stats/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        token = LoginTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(self.client.get('/api/courses/cache/stats/').status_code, 200)
+
+    def test_register_token_carries_role(self):
+        response = APIClient().post('/api/authentication/register/', {
+            'username': 'student', 'email': 'student@example.com', 'password': 'Str0ng-passw0rd', 'role': 'student',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        token = AccessToken(response.data['access'])
+        self.assertEqual((token['username'], token['role'], token['is_staff']), ('student', 'student', False))
+
+
+@override_settings(PRESENCE_FLUSH_INTERVAL=0)
+class PresenceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        presence.flush()
+        # Drained in the test's transaction, so nothing is left for later tests or the exit flush
+        self.addCleanup(presence.flush, expire=False)
+        self.user = User.objects.create_user(username='student', email='student@example.com', password='password')
+        self.profile = UserProfile.objects.create(user=self.user, role='student')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {LoginTokenObtainPairSerializer.get_token(self.user).access_token}")
+
+    def test_status_endpoints_skip_the_database(self):
+        with self.assertNumQueries(0):
+            response = self.client.post('/api/authentication/user/status-update/', {'is_online': True}, format='json')
+        self.assertEqual(response.data, {
+            'user': self.user.id, 'username': 'student', 'email': 'student@example.com', 'role': 'student', 'is_online': True,
+        })
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/authentication/user/check-online/')
+        self.assertEqual(response.data, {'is_online': True})
+        self.assertTrue(self.client.get('/api/authentication/user/profile/').data['is_online'])
+
+        response = self.client.post('/api/authentication/user/status-update/', {'is_online': 'maybe'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_flush_persists_and_expires(self):
+        other = User.objects.create_user(username='other', password='password')
+        UserProfile.objects.create(user=other, role='student', is_online=True)  # stale flag, no heartbeat
+        presence.heartbeat(self.user.id)
+
+        with self.assertNumQueries(3):
+            self.assertEqual(presence.flush(), 2)
+        self.assertEqual(
+            dict(UserProfile.objects.values_list('user_id', 'is_online')), {self.user.id: True, other.id: False})
+
+        cache.delete(f"presence:{self.user.id}")  # the heartbeat's TTL ran out
+        self.assertFalse(presence.is_online(self.user.id))
+        call_command('flush_presence', stdout=io.StringIO())
+        self.profile.refresh_from_db()
+        self.assertFalse(self.profile.is_online)
+
+    def test_going_offline(self):
+        presence.heartbeat(self.user.id)
+        presence.flush()
+        self.client.post('/api/authentication/user/status-update/', {'is_online': False}, format='json')
+        self.assertFalse(presence.is_online(self.user.id))
+        self.assertEqual(presence.flush(), 1)
+        self.profile.refresh_from_db()
+        self.assertFalse(self.profile.is_online)
+
+    @override_settings(DEBUG=False, TESTING=False)
+    def test_no_expiry_on_a_per_process_cache(self):
+        self.profile.is_online = True
+        self.profile.save()  # online through a heartbeat this process never saw
+        with self.assertLogs('authentication.presence', 'WARNING'):
+            self.assertEqual(presence.flush(), 0)
+        self.profile.refresh_from_db()
+        self.assertTrue(self.profile.is_online)
+
+    def test_exit_flush_survives_a_missing_database(self):
+        presence.heartbeat(self.user.id)
+        with mock.patch.object(presence, 'online_among', side_effect=OperationalError("no such table")), \
+                self.assertLogs('authentication.presence', 'WARNING'):
+            presence_module._flush_at_exit()
+        presence_module._flush_at_exit()  # the change was kept for the next flush
+        self.profile.refresh_from_db()
+        self.assertTrue(self.profile.is_online)
+        with self.assertNumQueries(0):
+            presence_module._flush_at_exit()  # nothing changed, e.g. after a management command
+
+    def test_nothing_is_pending_after_a_test(self):
+        self.client.post('/api/authentication/user/status-update/', {'is_online': True}, format='json')
+        self.client.post('/api/authentication/user/status-update/', {'is_online': False}, format='json')
+        self.assertEqual(presence._changed, {self.user.id})
+        self.doCleanups()
+        self.assertEqual(presence._changed, set())
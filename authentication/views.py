@@ -4,10 +4,11 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.contrib.auth.models import User
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
+from .authentication import get_role
 from .models import UserProfile
+from .presence import presence
 from .serializers import UserProfileSerializer
 from rest_framework import serializers
 from django.core.exceptions import ValidationError
@@ -20,7 +21,9 @@ class LoginTokenObtainPairSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
         token['username'] = user.username
+        token['email'] = user.email
         token['role'] = user.userprofile.role
+        token['is_staff'] = user.is_staff
         return token
 
     def validate(self, attrs):
@@ -137,8 +140,8 @@ def registerUser(request):
     user = User.objects.create_user(username=username, email=email, password=password)
     user_profile = UserProfile.objects.create(user=user, role=role)
 
-    # Generate token for the new user
-    refresh = RefreshToken.for_user(user)
+    # Generate token for the new user (with the same claims as a login)
+    refresh = LoginTokenObtainPairSerializer.get_token(user)
     return Response({
         "refresh": str(refresh),
         "access": str(refresh.access_token),
@@ -149,31 +152,37 @@ def registerUser(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def getUserProfile(request):
-    user_profile = UserProfile.objects.get(user=request.user)
+    try:
+        user_profile = UserProfile.objects.select_related('user').get(user_id=request.user.id)
+    except UserProfile.DoesNotExist:
+        return Response({"error": "UserProfile not found."}, status=status.HTTP_404_NOT_FOUND)
     serializer = UserProfileSerializer(user_profile)
-    return Response(serializer.data)
+    # The stored flag lags behind; the presence cache is authoritative
+    return Response({**serializer.data, "is_online": presence.is_online(request.user.id)})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def updateUserStatus(request):
+    """Record a presence heartbeat; the profile row is updated by the next presence flush."""
     try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        is_online = request.data.get('is_online')
-
-        # Update user online status
-        user_profile.is_online = is_online
-        user_profile.save()
+        is_online = UserProfile._meta.get_field('is_online').to_python(request.data.get('is_online'))
+    except ValidationError:
+        return Response({"error": "is_online must be a boolean."}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = UserProfileSerializer(user_profile)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-    except UserProfile.DoesNotExist:
-        return Response({"error": "UserProfile not found."}, status=status.HTTP_404_NOT_FOUND)
+    user = request.user
+    presence.heartbeat(user.id, is_online)
+    return Response({
+        "user": user.id,
+        "username": user.username,
+        "email": user.email,
+        "role": get_role(user),
+        "is_online": is_online,
+    }, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def checkUserOnlineStatus(request):
-    user_profile = UserProfile.objects.get(user=request.user)
-    return Response({"is_online": user_profile.is_online}, status=status.HTTP_200_OK)
+    return Response({"is_online": presence.is_online(request.user.id)}, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
 def getRoutes(request):
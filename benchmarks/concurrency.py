@@ -0,0 +1,114 @@
+"""
+Concurrent-connection benchmark against a running server (gunicorn, `manage.py runasgi`).
+
+At each concurrency level, that many clients each hold one keep-alive connection
+and poll the player endpoints back to back for `duration` seconds. A level is
+sustained when its p99 latency stays within `slo_ms` and at most `max_error_rate`
+of the requests fail (an error status, a timeout or a dropped connection); the
+report names the highest sustained level. Pointing it at a single gunicorn sync
+worker and then at a single uvicorn worker with `async_views` gives the before and
+after numbers for one worker process.
+"""
+import asyncio
+import random
+import time
+from urllib.parse import urlsplit
+from .runner import Scenario, percentile
+
+ENDPOINTS = ['get_video_watch_history', 'get_last_watched']
+
+
+async def _get(reader, writer, host, path, token):
+    """Send one GET and read the response; returns (status, whether the connection can be reused)."""
+    writer.write((f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer {token}\r\n"
+                  f"Connection: keep-alive\r\n\r\n").encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("Connection closed by the server")
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+        reusable = status_line.startswith(b'HTTP/1.1') and headers.get('connection') != 'close'
+    else:
+        await reader.read()
+        reusable = False
+    return int(status_line.split()[1]), reusable
+
+
+async def _client(host, port, requests, rng, deadline, timeout, samples):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        path, token = rng.choice(requests)
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            status, reusable = await asyncio.wait_for(_get(reader, writer, host, path, token), timeout)
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            status, reusable = None, False
+        samples.append(((time.perf_counter() - started) * 1000, status))
+        if not reusable and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _run_level(host, port, requests, concurrency, duration, timeout, seed):
+    samples = []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, requests, random.Random(seed + index), deadline, timeout, samples)
+        for index in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(ms for ms, _ in samples)
+    errors = sum(1 for _, status in samples if status is None or status >= 400)
+    return {
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 1.0,
+        'requests_per_sec': round(len(samples) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 0.50), 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 3) if latencies else None,
+    }
+
+
+def run_concurrency_benchmark(url, levels=(10, 50, 100, 250, 500, 1000), duration=10, timeout=5,
+                              slo_ms=1000, max_error_rate=0.01, async_views=False, sample_users=100, seed=0):
+    """
+    Poll the server at `url` with each of `levels` concurrent connections and report
+    throughput, latency and errors per level plus the highest sustained level.
+    With `async_views`, the async/ variants of the endpoints are polled.
+    """
+    target = urlsplit(url)
+    host, port = target.hostname, target.port or 80
+    scenario = Scenario(sample_users, random.Random(seed))
+    requests = []
+    for index in range(1000):
+        user, token, method, path, data = scenario.request(ENDPOINTS[index % len(ENDPOINTS)])
+        if async_views:
+            path = path.replace('/api/courses/', '/api/courses/async/', 1)
+        requests.append((target.path.rstrip('/') + path, token))
+
+    results = []
+    for concurrency in levels:
+        result = asyncio.run(_run_level(host, port, requests, concurrency, duration, timeout, seed))
+        result['sustained'] = (result['error_rate'] <= max_error_rate and result['p99_ms'] is not None
+                               and result['p99_ms'] <= slo_ms)
+        results.append(result)
+    return {
+        'url': url,
+        'async_views': async_views,
+        'config': {'duration': duration, 'timeout': timeout, 'slo_ms': slo_ms, 'max_error_rate': max_error_rate},
+        'levels': results,
+        'sustained_concurrency': max((result['concurrency'] for result in results if result['sustained']), default=0),
+    }
@@ -0,0 +1,104 @@
+"""
+Per-request cost of database connection handling.
+
+Requests go through the Django test client, which leaves connections alone, so each
+one is wrapped in close_old_connections() the way a server's request_started and
+request_finished signals do it. The same requests are replayed with a new connection
+per request (CONN_MAX_AGE=0), with persistent connections and, on PostgreSQL, with a
+psycopg pool, after one unmeasured pass so every mode sees the same warm cache. The
+report gives latency per mode and how often Django connected (with a pool, a connect
+is a checkout of an already open connection).
+"""
+import random
+import time
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from .runner import Scenario, percentile
+
+ENDPOINTS = ['get_video_watch_history', 'get_last_watched', 'get_course_progress', 'user_profile']
+MODES = ['per-request', 'persistent', 'pool']
+
+
+def _close(connection):
+    connection.close()
+    if hasattr(connection, 'close_pool'):
+        connection.close_pool()
+
+
+def _configure(connection, base, mode):
+    """Switch `connection` to `mode`, closing whatever it had open."""
+    _close(connection)
+    options = {key: value for key, value in base.get('OPTIONS', {}).items() if key != 'pool'}
+    if mode == 'pool':
+        options['pool'] = base.get('OPTIONS', {}).get('pool') or True
+    connection.settings_dict.update({
+        'CONN_MAX_AGE': 600 if mode == 'persistent' else 0,
+        'CONN_HEALTH_CHECKS': mode == 'persistent',
+        'OPTIONS': options,
+    })
+
+
+def _replay(client, traffic):
+    """Latency (ms) of each request, wrapped in close_old_connections() like a server does."""
+    latencies = []
+    for user, token, method, path, data in traffic:
+        started = time.perf_counter()
+        close_old_connections()
+        response = client.get(path, HTTP_AUTHORIZATION=f"Bearer {token}")
+        close_old_connections()
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{path} answered {response.status_code}")
+    return sorted(latencies)
+
+
+def run_connection_benchmark(requests=500, sample_users=100, seed=0, modes=None):
+    """
+    Replay `requests` read requests once per connection mode and report latency
+    percentiles and the number of connects for each.
+    """
+    connection = connections['default']
+    modes = modes or [mode for mode in MODES if mode != 'pool' or connection.vendor == 'postgresql']
+    if 'pool' in modes and connection.vendor != 'postgresql':
+        raise ValueError("The pool mode needs PostgreSQL.")
+
+    rng = random.Random(seed)
+    scenario = Scenario(sample_users, rng)
+    traffic = [scenario.request(ENDPOINTS[index % len(ENDPOINTS)]) for index in range(requests)]
+    base = dict(connection.settings_dict)
+    connects = []
+
+    def count(sender, **kwargs):
+        connects.append(sender)
+
+    client = Client()
+    report = {'database': connection.vendor, 'config': {'requests': requests}, 'modes': {}}
+    connection_created.connect(count)
+    try:
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            _replay(client, traffic)
+            for mode in modes:
+                _configure(connection, base, mode)
+                connects.clear()
+                latencies = _replay(client, traffic)
+                report['modes'][mode] = {
+                    'connects': len(connects),
+                    'mean_ms': round(sum(latencies) / len(latencies), 3),
+                    'p50_ms': round(percentile(latencies, 0.50), 3),
+                    'p95_ms': round(percentile(latencies, 0.95), 3),
+                    'p99_ms': round(percentile(latencies, 0.99), 3),
+                }
+    finally:
+        connection_created.disconnect(count)
+        _close(connection)
+        connection.settings_dict.update(base)
+
+    baseline = report['modes'].get('per-request')
+    if baseline:
+        report['saved_ms_per_request'] = {
+            mode: round(baseline['mean_ms'] - stats['mean_ms'], 3)
+            for mode, stats in report['modes'].items() if mode != 'per-request'
+        }
+    return report
@@ -0,0 +1,84 @@
+import random
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from authentication.models import UserProfile
+from courses import cache, search
+from courses.models import Course, Enrollment, Video, WatchHistory
+from courses.progress import rebuild_progress
+
+USERNAME_PREFIX = 'bench_user_'
+PASSWORD = 'Bench-password-1'
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def generate_dataset(users, courses, videos_per_course, enrollments_per_user, watched_per_enrollment,
+                     seed=0, batch_size=1000, log=print):
+    """
+    Bulk-create a synthetic catalog and audience: `users` students (password PASSWORD),
+    `courses` courses with `videos_per_course` videos each, `enrollments_per_user`
+    random enrollments per user and up to `watched_per_enrollment` watch-history rows
+    per enrollment. Progress counters are rebuilt afterwards.
+    """
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)  # Hash once; PBKDF2 per user would dominate the run
+    start = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+
+    with transaction.atomic():
+        new_users = User.objects.bulk_create(
+            [User(username=f"{USERNAME_PREFIX}{start + i}", email=f"{USERNAME_PREFIX}{start + i}@example.com",
+                  password=password) for i in range(users)],
+            batch_size=batch_size,
+        )
+        UserProfile.objects.bulk_create([UserProfile(user=user, role='student') for user in new_users],
+                                        batch_size=batch_size)
+        log(f"Created {len(new_users)} users")
+
+        new_courses = Course.objects.bulk_create(
+            [Course(title=f"Benchmark course {start + i}", description="Synthetic course " * 20,
+                    poster_url=f"https://example.com/posters/{i}.jpg") for i in range(courses)],
+            batch_size=batch_size,
+        )
+        videos = Video.objects.bulk_create(
+            [Video(course=course, title=f"Lecture {order}", description="Synthetic lecture " * 10,
+                   video_url=f"https://example.com/videos/{course.id}/{order}.mp4",
+                   duration=timedelta(minutes=rng.randint(3, 40)), video_order=order)
+             for course in new_courses for order in range(1, videos_per_course + 1)],
+            batch_size=batch_size,
+        )
+        log(f"Created {len(new_courses)} courses and {len(videos)} videos")
+
+        course_videos = {}
+        for video in videos:
+            course_videos.setdefault(video.course_id, []).append(video)
+
+        enrollments, history = [], []
+        for user in new_users:
+            for course in rng.sample(new_courses, min(enrollments_per_user, len(new_courses))):
+                enrollments.append(Enrollment(user=user, course=course))
+                playlist = course_videos.get(course.id, [])
+                for video in playlist[:rng.randint(0, min(watched_per_enrollment, len(playlist)))]:
+                    history.append(WatchHistory(user=user, course=course, video=video,
+                                                last_watched_time=rng.uniform(0, 1800),
+                                                watched_status=rng.random() < 0.6))
+        for batch in _batches(enrollments, batch_size):
+            Enrollment.objects.bulk_create(batch)
+        for batch in _batches(history, batch_size):
+            WatchHistory.objects.bulk_create(batch)
+        log(f"Created {len(enrollments)} enrollments and {len(history)} watch-history rows")
+
+        # bulk_create skips the signals that keep these in sync
+        rebuild_progress(Enrollment.objects.filter(user__in=new_users))
+        search.index(Course.objects.filter(pk__in=[course.pk for course in new_courses]))
+        search.index(Video.objects.filter(course__in=new_courses))
+        cache.bump_version(cache.CATALOG)
+
+    return {
+        'users': len(new_users), 'courses': len(new_courses), 'videos': len(videos),
+        'enrollments': len(enrollments), 'watch_history': len(history),
+    }
@@ -0,0 +1,53 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from benchmarks.concurrency import run_concurrency_benchmark
+
+
+class Command(BaseCommand):
+    help = "Poll a running server with increasing numbers of concurrent connections and report what it sustains as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="Base URL of the server, e.g. http://127.0.0.1:8000")
+        parser.add_argument('--levels', default='10,50,100,250,500,1000',
+                            help="Comma-separated numbers of concurrent connections to try.")
+        parser.add_argument('--duration', type=float, default=10, help="Seconds spent at each level.")
+        parser.add_argument('--timeout', type=float, default=5, help="Seconds before a request counts as failed.")
+        parser.add_argument('--slo-ms', type=float, default=1000, help="p99 latency a sustained level stays within.")
+        parser.add_argument('--max-error-rate', type=float, default=0.01)
+        parser.add_argument('--async-views', action='store_true', help="Poll the async/ variants of the endpoints.")
+        parser.add_argument('--sample-users', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--baseline', help="A previous report to compare the sustained concurrency against.")
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['levels'].split(',')]
+        except ValueError:
+            raise CommandError("--levels must be comma-separated integers.")
+        try:
+            report = run_concurrency_benchmark(
+                options['url'],
+                levels=levels,
+                duration=options['duration'],
+                timeout=options['timeout'],
+                slo_ms=options['slo_ms'],
+                max_error_rate=options['max_error_rate'],
+                async_views=options['async_views'],
+                sample_users=options['sample_users'],
+                seed=options['seed'],
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                report['baseline_sustained_concurrency'] = json.load(baseline)['sustained_concurrency']
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(
+                f"Sustained {report['sustained_concurrency']} concurrent connections; wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,34 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from benchmarks.connections import MODES, run_connection_benchmark
+
+
+class Command(BaseCommand):
+    help = "Compare per-request latency with a new connection per request, persistent connections and a pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--mode', action='append', choices=MODES, dest='modes',
+                            help="Connection mode to measure (repeatable; default: all the database supports).")
+        parser.add_argument('--sample-users', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            report = run_connection_benchmark(
+                requests=options['requests'],
+                sample_users=options['sample_users'],
+                seed=options['seed'],
+                modes=options['modes'],
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote connection benchmark report to {options['output']}"))
+        else:
+            self.stdout.write(output)
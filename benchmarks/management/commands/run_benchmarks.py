@@ -0,0 +1,35 @@
+import json
+from django.core.management.base import BaseCommand
+from benchmarks.runner import compare, run_benchmark
+
+
+class Command(BaseCommand):
+    help = "Replay a realistic request mix against every API endpoint and report throughput, latency and queries as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--warmup', type=int, default=100)
+        parser.add_argument('--sample-users', type=int, default=100,
+                            help="Number of seeded users the traffic is spread over.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--baseline', help="A previous report to compare against (adds a 'change_percent' section).")
+
+    def handle(self, *args, **options):
+        report = run_benchmark(
+            requests=options['requests'],
+            warmup=options['warmup'],
+            sample_users=options['sample_users'],
+            seed=options['seed'],
+        )
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                report['change_percent'] = compare(report, json.load(baseline))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote benchmark report to {options['output']}"))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from benchmarks.data import generate_dataset
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic users, courses, videos, enrollments and watch history for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--courses', type=int, default=200)
+        parser.add_argument('--videos-per-course', type=int, default=20)
+        parser.add_argument('--enrollments-per-user', type=int, default=5)
+        parser.add_argument('--watched-per-enrollment', type=int, default=10,
+                            help="Upper bound of watch-history rows per enrollment.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        counts = generate_dataset(
+            users=options['users'],
+            courses=options['courses'],
+            videos_per_course=options['videos_per_course'],
+            enrollments_per_user=options['enrollments_per_user'],
+            watched_per_enrollment=options['watched_per_enrollment'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Seeded " + ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+        ))
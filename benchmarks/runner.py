@@ -0,0 +1,179 @@
+import math
+import random
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, override_settings
+from authentication.views import LoginTokenObtainPairSerializer
+from courses.models import Enrollment, Video
+from .data import PASSWORD, USERNAME_PREFIX
+
+# Relative frequency of each request in the replayed traffic, modelled on a player-heavy
+# frontend: progress heartbeats and resume lookups dominate, catalog pages come next.
+REQUEST_MIX = {
+    'list_courses': 8,
+    'list_courses_with_enrollment_status': 8,
+    'enrolled_list_courses': 6,
+    'get_course_details': 5,
+    'get_course_videos': 8,
+    'get_course_progress': 3,
+    'get_course_online_users': 2,
+    'get_last_watched': 8,
+    'update_last_watched': 3,
+    'get_course_watch_history': 5,
+    'get_video': 8,
+    'get_video_watch_history': 10,
+    'update_watch_history': 14,
+    'update_watch_history_batch': 4,
+    'enroll_in_course': 1,
+    'update_enrollment_status': 1,
+    'user_profile': 4,
+    'update_user_status': 2,
+    'check_user_online_status': 4,
+    'token_obtain_pair': 1,
+}
+
+
+class Scenario:
+    """Bench users with tokens, their enrollments and the videos of those courses."""
+
+    def __init__(self, sample_users, rng):
+        self.rng = rng
+        users = list(User.objects.filter(username__startswith=USERNAME_PREFIX).select_related('userprofile')
+                     .order_by('id')[:sample_users])
+        if not users:
+            raise ValueError("No benchmark users found; run seed_benchmark_data first.")
+        self.users = [
+            (user, str(LoginTokenObtainPairSerializer.get_token(user).access_token)) for user in users
+        ]
+        self.enrollments = defaultdict(list)
+        for user_id, course_id in Enrollment.objects.filter(user__in=users).values_list('user_id', 'course_id'):
+            self.enrollments[user_id].append(str(course_id))
+        course_ids = {course_id for courses in self.enrollments.values() for course_id in courses}
+        self.videos = defaultdict(list)
+        for course_id, video_id in Video.objects.filter(course_id__in=course_ids).values_list('course_id', 'id'):
+            self.videos[str(course_id)].append(str(video_id))
+        self.all_courses = sorted(course_ids)
+
+    def request(self, name):
+        """(user, token, method, path, data) for one request of the given kind."""
+        user, token = self.rng.choice(self.users)
+        course = self.rng.choice(self.enrollments[user.id] or self.all_courses)
+        video = self.rng.choice(self.videos[course] or [None])
+        position = round(self.rng.uniform(0, 1800), 1)
+        routes = {
+            'list_courses': ('get', '/api/courses/all-courses/', None),
+            'list_courses_with_enrollment_status': ('get', '/api/courses/all-courses-with-status/', None),
+            'enrolled_list_courses': ('get', '/api/courses/course-list/', None),
+            'get_course_details': ('get', f'/api/courses/course-details/{course}/', None),
+            'get_course_videos': ('get', f'/api/courses/course-videos/{course}/', None),
+            'get_course_progress': ('get', f'/api/courses/course/{course}/progress/', None),
+            'get_course_online_users': ('get', f'/api/courses/course/{course}/online/', None),
+            'get_last_watched': ('get', f'/api/courses/course/{course}/last-watched/', None),
+            'update_last_watched': ('post', f'/api/courses/course/{course}/last-watched/update/',
+                                    {'last_watched': video}),
+            'get_course_watch_history': ('get', f'/api/courses/course-content/{course}/watch-history/', None),
+            'get_video': ('get', f'/api/courses/videos/{video}/', None),
+            'get_video_watch_history': ('get', f'/api/courses/videos/{video}/watch-history/', None),
+            'update_watch_history': ('post', f'/api/courses/videos/{video}/watch-history/update/',
+                                     {'last_watched_time': position, 'watched_status': position > 1500}),
+            'update_watch_history_batch': ('post', '/api/courses/videos/watch-history/batch/', {'heartbeats': [
+                {'video_id': video_id, 'last_watched_time': position, 'watched_status': False}
+                for video_id in self.videos[course][:5]
+            ]}),
+            'enroll_in_course': ('post', '/api/courses/enroll/', {'course_id': {'course_id': course}}),
+            'update_enrollment_status': ('post', '/api/courses/enrollment/update/',
+                                         {'course_id': course, 'status': 'active'}),
+            'user_profile': ('get', '/api/authentication/user/profile/', None),
+            'update_user_status': ('post', '/api/authentication/user/status-update/',
+                                   {'is_online': self.rng.random() < 0.8}),
+            'check_user_online_status': ('get', '/api/authentication/user/check-online/', None),
+            'token_obtain_pair': ('post', '/api/authentication/login/',
+                                  {'username': user.username, 'password': PASSWORD}),
+        }
+        return (user, token, *routes[name])
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample['ms'] for sample in samples)
+    queries = [sample['queries'] for sample in samples if sample['queries'] is not None]
+    spent = sum(latencies) / 1000
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample['status'] >= 400),
+        'requests_per_sec': round(len(samples) / (elapsed if elapsed is not None else spent), 2) if samples else 0,
+        'p50_ms': round(percentile(latencies, 0.50), 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 3) if latencies else None,
+        'mean_queries': round(sum(queries) / len(queries), 2) if queries else None,
+        'max_queries': max(queries) if queries else None,
+    }
+
+
+def run_benchmark(requests=1000, warmup=100, sample_users=100, seed=0, mix=None):
+    """
+    Replay `requests` requests drawn from `mix` (default REQUEST_MIX) through the Django
+    test client and return per-endpoint throughput, latency percentiles and query counts.
+    Per-endpoint requests_per_sec is the rate that endpoint alone would sustain serially.
+    """
+    rng = random.Random(seed)
+    mix = mix or REQUEST_MIX
+    scenario = Scenario(sample_users, rng)
+    names, weights = list(mix), list(mix.values())
+    client = Client()
+    samples = defaultdict(list)
+
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        started = None
+        for index in range(warmup + requests):
+            if index == warmup:
+                started = time.perf_counter()
+            name = rng.choices(names, weights)[0]
+            user, token, method, path, data = scenario.request(name)
+            headers = {} if name == 'token_obtain_pair' else {'HTTP_AUTHORIZATION': f"Bearer {token}"}
+
+            request_started = time.perf_counter()
+            response = getattr(client, method)(path, data, content_type='application/json', **headers) \
+                if method == 'post' else client.get(path, **headers)
+            elapsed_ms = (time.perf_counter() - request_started) * 1000
+
+            if index >= warmup:
+                metrics = getattr(response.wsgi_request, 'request_metrics', None)
+                samples[name].append({
+                    'ms': elapsed_ms,
+                    'status': response.status_code,
+                    'queries': metrics.queries if metrics else None,
+                })
+        wall = time.perf_counter() - started if started else 0
+
+    everything = [sample for endpoint in samples.values() for sample in endpoint]
+    return {
+        'database': connection.vendor,
+        'config': {'requests': requests, 'warmup': warmup, 'sample_users': sample_users, 'seed': seed},
+        'overall': summarize(everything, wall),
+        'endpoints': {name: summarize(samples[name], None) for name in sorted(samples)},
+    }
+
+
+def compare(report, baseline):
+    """Per-endpoint change (in percent) of p50/p95/p99 latency and mean queries versus a baseline report."""
+    changes = {}
+    for name, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        changes[name] = {
+            metric: round((current[metric] - previous[metric]) / previous[metric] * 100, 1)
+            for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'mean_queries')
+            if current.get(metric) is not None and previous.get(metric)
+        }
+    return changes
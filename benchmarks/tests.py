@@ -0,0 +1,33 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from courses.heartbeats import watch_history_buffer
+from .connections import run_connection_benchmark
+from .data import generate_dataset
+from .runner import REQUEST_MIX, compare, run_benchmark
+
+
+@override_settings(WATCH_HISTORY_FLUSH_INTERVAL=0, PRESENCE_FLUSH_INTERVAL=0)
+class BenchmarkHarnessTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(watch_history_buffer.flush)
+        generate_dataset(users=5, courses=3, videos_per_course=4, enrollments_per_user=2,
+                         watched_per_enrollment=2, log=lambda message: None)
+
+    def test_every_endpoint_is_replayed_without_errors(self):
+        # Logging in hashes a password per request, which only slows the test down
+        mix = {name: 1 for name in REQUEST_MIX if name != 'token_obtain_pair'}
+        report = run_benchmark(requests=200, warmup=5, sample_users=5, mix=mix)
+
+        self.assertEqual(set(report['endpoints']), set(mix))
+        self.assertEqual(report['overall']['requests'], 200)
+        self.assertEqual(report['overall']['errors'], 0)
+        for stats in report['endpoints'].values():
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+            self.assertIsNotNone(stats['mean_queries'])
+        self.assertEqual(set(compare(report, report)), set(mix))
+
+    def test_connection_modes_are_compared(self):
+        report = run_connection_benchmark(requests=20, sample_users=5)
+        self.assertEqual(set(report['modes']), {'per-request', 'persistent'})
+        self.assertIn('persistent', report['saved_ms_per_request'])
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Course, Video, WatchHistory, Enrollment
+from .models import Course, Video, WatchHistory, Enrollment, IngestionJob
 
 class CourseAdmin(admin.ModelAdmin):
     list_display = ('title', 'created_at', 'updated_at')
@@ -17,12 +17,18 @@ class WatchHistoryAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'course__title', 'video__title')
 
 class EnrollmentAdmin(admin.ModelAdmin):
-    list_display = ('user', 'course', 'status', 'completion_percentage', 'completion_date', 'enrollment_date')
+    list_display = ('user', 'course', 'status', 'completion_percentage', 'videos_watched', 'total_videos', 'completion_date', 'enrollment_date')
     list_filter = ('user', 'course', 'status', 'enrollment_date')
     search_fields = ('user__username', 'course__title')
 
+class IngestionJobAdmin(admin.ModelAdmin):
+    list_display = ('video', 'uploader', 'status', 'created_at', 'updated_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('video__title', 'source')
+
 # Register the models with their respective custom admin configurations
 admin.site.register(Course, CourseAdmin)
 admin.site.register(Video, VideoAdmin)
 admin.site.register(WatchHistory, WatchHistoryAdmin)
 admin.site.register(Enrollment, EnrollmentAdmin)
+admin.site.register(IngestionJob, IngestionJobAdmin)
@@ -0,0 +1,191 @@
+"""
+Native async variants of the endpoints players poll and post heartbeats to, mounted
+under `async/` with the same responses as their sync counterparts.
+
+DRF's views are sync-only, so these are plain Django async views: they authenticate
+with the same stateless JWT check (no query) and render with DRF's JSONRenderer.
+Under ASGI (see the runasgi command) a client waiting on a response holds no worker;
+each ORM call still runs on a thread from Django's pool, which bounds how many
+queries run at once rather than how many clients can be connected.
+"""
+import json
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from authentication.authentication import ClaimsJWTAuthentication
+from . import cache, conditional
+from .heartbeats import read_batch, sort_batch, watch_history_buffer
+from .models import Course, Enrollment, Video, WatchHistory
+from .permissions import aget_enrolled_course_ids, ais_enrolled
+from .progress import save_watch_history
+from .serializers import WatchHistorySerializer
+from .utils import validate_uuid
+
+_authentication = ClaimsJWTAuthentication()
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def jwt_required(view):
+    """Authenticate the request from its bearer token, answering 401 like DRF does."""
+    @csrf_exempt
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = _authentication.authenticate(request)
+            if result is None:
+                raise exceptions.NotAuthenticated()
+        except exceptions.APIException as exc:
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            response = json_response(data, status=status.HTTP_401_UNAUTHORIZED)
+            response['WWW-Authenticate'] = _authentication.authenticate_header(request)
+            return response
+        request.user, request.auth = result
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def read_json(request):
+    """The request's JSON object body ({} when empty); raises ValueError if it isn't one."""
+    data = json.loads(request.body) if request.body else {}
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object.")
+    return data
+
+
+async def aget_video_validators(video_id):
+    """views.get_video_validators() for async views; both read the same cache entry."""
+    async def build():
+        row = await Video.objects.filter(id=video_id).values('course_id', 'updated_at').afirst()
+        if row is None:
+            return None
+        return {'course': str(row['course_id']), **conditional.make_validators(row['updated_at'], 1)}
+    return await cache.aget_or_set(cache.video_scope(video_id), 'validators', build)
+
+
+@require_GET
+@jwt_required
+async def get_last_watched(request, course_id):
+    """Retrieve the last-watched video for a specific course."""
+    course_uuid = validate_uuid(course_id)
+    if not course_uuid:
+        return json_response({"error": "Invalid course ID format."}, status=status.HTTP_400_BAD_REQUEST)
+
+    # The enrollment lookup doubles as the enrollment check
+    user = request.user
+    enrollment = await Enrollment.objects.filter(user_id=user.id, course_id=course_uuid).values(
+        'last_watched_video').afirst()
+    if not enrollment:
+        if not await Course.objects.filter(id=course_uuid).aexists():
+            return json_response({"error": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+        return json_response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+
+    last_watched_video = enrollment['last_watched_video']
+    if not last_watched_video:
+        # If no video has been watched, fall back to the first one
+        last_watched_video = await Video.objects.filter(course_id=course_uuid, video_order=1).values_list(
+            'id', flat=True).afirst()
+        if not last_watched_video:
+            return json_response({"error": "No videos available in this course."}, status=status.HTTP_404_NOT_FOUND)
+    return json_response({"last_watched_video": last_watched_video})
+
+
+@require_GET
+@jwt_required
+async def get_video_watch_history(request, video_id):
+    """Retrieve watch history for a specific video."""
+    video_uuid = validate_uuid(video_id)
+    if not video_uuid:
+        return json_response({"error": "Invalid video ID format."}, status=status.HTTP_400_BAD_REQUEST)
+
+    video = await aget_video_validators(video_uuid)
+    if video is None:
+        return json_response({"error": "Video not found."}, status=status.HTTP_404_NOT_FOUND)
+    user = request.user
+    if not await ais_enrolled(user, video['course']):
+        return json_response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        watch_history = await WatchHistory.objects.select_related('video', 'course').aget(
+            user_id=user.id, video_id=video_uuid)
+        data = WatchHistorySerializer(watch_history).data
+    except WatchHistory.DoesNotExist:
+        data = {
+            "id": None,
+            "user": user.id,
+            "video": video_uuid,
+            "course": video['course'],
+            "last_watched_time": 0,
+            "watched_status": False,
+        }
+
+    # Prefer a heartbeat that is still waiting in this process's write buffer
+    pending = watch_history_buffer.get(user.id, video_uuid)
+    if pending:
+        data["last_watched_time"] = pending.last_watched_time
+        data["watched_status"] = pending.watched_status
+    return json_response(data)
+
+
+@require_POST
+@jwt_required
+async def update_watch_history(request, video_id):
+    """Handles updating the watch history for a specific video."""
+    video_uuid = validate_uuid(video_id)
+    if not video_uuid:
+        return json_response({"error": "Invalid video ID format."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        data = read_json(request)
+    except ValueError:
+        return json_response({"error": "Invalid JSON body."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        video = await Video.objects.select_related('course').aget(id=video_uuid)
+    except Video.DoesNotExist:
+        return json_response({"error": "Video not found."}, status=status.HTTP_404_NOT_FOUND)
+    user = request.user
+    if not await ais_enrolled(user, video.course_id):
+        return json_response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+
+    last_watched_time = data.get('last_watched_time')
+    watched_status = data.get('watched_status', False)
+    if last_watched_time is None:
+        return json_response({"error": "Last watched time is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    # One atomic block in a worker thread: the row stays locked from the read of its old values to the counter UPDATE
+    watch_history = await sync_to_async(save_watch_history)(user.id, video, last_watched_time, watched_status)
+    return json_response(WatchHistorySerializer(watch_history).data)
+
+
+@require_POST
+@jwt_required
+async def update_watch_history_batch(request):
+    """Accepts many watch-progress heartbeats and buffers them for a bulk write."""
+    try:
+        data = read_json(request)
+    except ValueError:
+        return json_response({"error": "Invalid JSON body."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        heartbeats, video_ids = read_batch(data.get('heartbeats'))
+    except ValueError as exc:
+        return json_response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = request.user
+    video_courses = {
+        str(video_id): str(course_id)
+        async for video_id, course_id in Video.objects.filter(id__in=video_ids).values_list('id', 'course_id')
+    }
+    accepted, rejected = sort_batch(heartbeats, video_courses, await aget_enrolled_course_ids(user.id))
+
+    def buffer():
+        # add() writes the buffer out itself once it is full
+        for video_uuid, heartbeat in accepted:
+            watch_history_buffer.add(user.id, video_uuid, heartbeat)
+    await sync_to_async(buffer)()
+    return json_response({"accepted": len(accepted), "rejected": rejected}, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,116 @@
+import hashlib
+import threading
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from ELearning.replicas import primary
+
+KEY_PREFIX = 'courses'
+CATALOG = 'catalog'
+
+_MISSING = object()
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def course_scope(course_id):
+    return f"course:{course_id}"
+
+
+def video_scope(video_id):
+    return f"video:{video_id}"
+
+
+def _record(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def _version_key(scope):
+    return f"{KEY_PREFIX}:version:{scope}"
+
+
+def get_version(scope):
+    """Current version of a scope; payload keys embed it, so bumping it retires them all."""
+    version = cache.get(_version_key(scope))
+    if version is None:
+        cache.add(_version_key(scope), 1, timeout=None)
+        version = cache.get(_version_key(scope), 1)
+    return version
+
+
+async def aget_version(scope):
+    version = await cache.aget(_version_key(scope))
+    if version is None:
+        await cache.aadd(_version_key(scope), 1, timeout=None)
+        version = await cache.aget(_version_key(scope), 1)
+    return version
+
+
+def bump_version(scope):
+    """Invalidate every payload cached under `scope`."""
+    key = _version_key(scope)
+    cache.add(key, 1, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(key, 2, timeout=None)
+    _record('invalidations')
+
+
+def bump_version_on_commit(scope, using=None):
+    """
+    bump_version() once the current transaction commits (at once outside one). Bumping
+    earlier would let a request rebuild from the old committed rows under the new
+    version, and that stale payload would stay cached.
+    """
+    transaction.on_commit(lambda: bump_version(scope), using=using)
+
+
+def request_key(request, *params):
+    """Stable cache name for the query parameters a payload depends on."""
+    values = '&'.join(f"{param}={request.query_params.get(param, '')}" for param in params)
+    return hashlib.md5(values.encode()).hexdigest()
+
+
+def get_or_set(scope, name, build):
+    """Return the payload cached as `name` in `scope`, calling `build()` on a miss."""
+    key = f"{KEY_PREFIX}:{scope}:v{get_version(scope)}:{name}"
+    payload = cache.get(key, _MISSING)
+    if payload is not _MISSING:
+        _record('hits')
+        return payload
+
+    _record('misses')
+    with primary():  # The payload outlives any replica lag
+        payload = build()
+    cache.set(key, payload, timeout=settings.COURSES_CACHE_TIMEOUT)
+    return payload
+
+
+async def aget_or_set(scope, name, build):
+    """get_or_set() for async views; `build` is a coroutine function."""
+    key = f"{KEY_PREFIX}:{scope}:v{await aget_version(scope)}:{name}"
+    payload = await cache.aget(key, _MISSING)
+    if payload is not _MISSING:
+        _record('hits')
+        return payload
+
+    _record('misses')
+    with primary():
+        payload = await build()
+    await cache.aset(key, payload, timeout=settings.COURSES_CACHE_TIMEOUT)
+    return payload
+
+
+def get_stats():
+    """Hit, miss and invalidation counters for this process."""
+    with _stats_lock:
+        return {counter: _stats[counter] for counter in ('hits', 'misses', 'invalidations')}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
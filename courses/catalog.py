@@ -0,0 +1,223 @@
+"""
+Bulk catalog import and export (the import_catalog / export_catalog commands).
+
+A manifest lists courses with their videos in playback order, as JSON
+
+    [{"title": ..., "description": ..., "poster_url": ..., "videos": [
+        {"title": ..., "description": ..., "video_url": ..., "poster_url": ..., "duration": "00:10:00"}]}]
+
+or as CSV with one row per video (CSV_COLUMNS; a row without video_title lists a
+course without videos). Courses are matched by title and videos by (course, title),
+so importing the same manifest twice changes nothing. The whole manifest is
+validated before anything is written; rows are then written with bulk_create and
+bulk_update, `batch_size` courses per transaction. Imported videos are numbered
+1..n in manifest order, followed by the course's videos the manifest doesn't list.
+"""
+import csv
+import json
+from django.db import transaction
+from django.utils import timezone
+from django.utils.duration import duration_string
+from . import cache, progress, search
+from .models import Course, Enrollment, Video
+from .serializers import CourseSerializer, VideoSerializer
+
+COURSE_FIELDS = ['title', 'description', 'poster_url']
+VIDEO_FIELDS = ['title', 'description', 'video_url', 'poster_url', 'duration']
+CSV_COLUMNS = [f'course_{field}' for field in COURSE_FIELDS] + [f'video_{field}' for field in VIDEO_FIELDS]
+
+
+class ManifestError(ValueError):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} problem(s) in the manifest:\n" + '\n'.join(errors))
+        self.errors = errors
+
+
+def read_manifest(file, manifest_format):
+    """Courses (dicts with a `videos` list) from a JSON or CSV manifest file."""
+    if manifest_format == 'json':
+        courses = json.load(file)
+        if not isinstance(courses, list):
+            raise ManifestError(["A JSON manifest must be a list of courses."])
+        return courses
+
+    courses = {}
+    for row in csv.DictReader(file):
+        # Empty CSV cells are missing values
+        row = {column: value for column, value in row.items() if value not in ('', None)}
+        course = courses.setdefault(row.get('course_title'), {
+            **{field: row[f'course_{field}'] for field in COURSE_FIELDS if f'course_{field}' in row}, 'videos': [],
+        })
+        if row.get('video_title'):
+            course['videos'].append({field: row[f'video_{field}'] for field in VIDEO_FIELDS if f'video_{field}' in row})
+    return list(courses.values())
+
+
+def validate(courses):
+    """
+    Validate every course and video with the API serializers; returns
+    [(course data, [video data, ...]), ...] or raises ManifestError with all problems.
+    """
+    errors = []
+    # Fields a manifest leaves out are left alone on existing rows
+    course_data = [{field: course[field] for field in COURSE_FIELDS if field in course} for course in courses]
+    course_serializer = CourseSerializer(data=course_data, many=True)
+    if not course_serializer.is_valid():
+        errors += [f"Course {index + 1}: {error}" for index, error in enumerate(course_serializer.errors) if error]
+
+    seen = set()
+    for course in course_data:
+        if course.get('title') in seen:
+            errors.append(f"Course '{course['title']}' is listed twice.")
+        seen.add(course.get('title'))
+
+    video_rows, positions = [], []
+    for course_index, course in enumerate(courses):
+        titles = set()
+        for video_index, video in enumerate(course.get('videos') or []):
+            video_rows.append({**{field: video[field] for field in VIDEO_FIELDS if field in video},
+                               'video_order': video_index + 1})
+            positions.append((course_index, video_index))
+            if video.get('title') in titles:
+                errors.append(f"Course '{course.get('title')}': video '{video.get('title')}' is listed twice.")
+            titles.add(video.get('title'))
+    video_serializer = VideoSerializer(data=video_rows, many=True)
+    if not video_serializer.is_valid():
+        errors += [
+            f"Course {course_index + 1}, video {video_index + 1}: {error}"
+            for (course_index, video_index), error in zip(positions, video_serializer.errors) if error
+        ]
+    if errors:
+        raise ManifestError(errors)
+
+    validated = [(data, []) for data in course_serializer.validated_data]
+    for (course_index, _), data in zip(positions, video_serializer.validated_data):
+        validated[course_index][1].append(data)
+    return validated
+
+
+def _changed(instance, data):
+    """Copy `data` onto `instance`; returns whether any value differed."""
+    changed = False
+    for field, value in data.items():
+        if getattr(instance, field) != value:
+            setattr(instance, field, value)
+            changed = True
+    return changed
+
+
+def _import_batch(batch, batch_size, stats):
+    """
+    Upsert one batch of validated courses; returns the IDs of the courses and videos
+    it changed, and of the courses that got new videos.
+    """
+    now = timezone.now()
+    existing = {}
+    for course in Course.objects.filter(title__in=[data['title'] for data, _ in batch]):
+        if course.title in existing:
+            raise ManifestError([f"Several existing courses are titled '{course.title}'."])
+        existing[course.title] = course
+
+    new_courses, changed_courses = [], []
+    for data, _ in batch:
+        course = existing.get(data['title'])
+        if course is None:
+            existing[data['title']] = course = Course(**data)
+            new_courses.append(course)
+        elif _changed(course, data):
+            course.updated_at = now  # bulk_update skips auto_now
+            changed_courses.append(course)
+    Course.objects.bulk_create(new_courses, batch_size=batch_size)
+    Course.objects.bulk_update(changed_courses, COURSE_FIELDS + ['updated_at'], batch_size=batch_size)
+
+    videos = {}
+    for video in Video.objects.filter(course__in=existing.values()).order_by('video_order', 'id'):
+        videos.setdefault(video.course_id, []).append(video)
+
+    new_videos, changed_videos = [], []
+    for data, video_rows in batch:
+        course = existing[data['title']]
+        current = {}
+        for video in videos.get(course.pk, []):
+            current.setdefault(video.title, video)
+        listed = {current[row['title']].pk for row in video_rows if row['title'] in current}
+        unlisted = [video for video in videos.get(course.pk, []) if video.pk not in listed]
+        # Renumber in one pass: manifest order first, then the videos it leaves out
+        ordered = [(current.get(row['title']), row) for row in video_rows] + [(video, {}) for video in unlisted]
+        for order, (video, row) in enumerate(ordered, start=1):
+            row = {**row, 'video_order': order}
+            if video is None:
+                new_videos.append(Video(course=course, **row))
+            elif _changed(video, row):
+                video.updated_at = now
+                changed_videos.append(video)
+    Video.objects.bulk_create(new_videos, batch_size=batch_size)
+    Video.objects.bulk_update(changed_videos, VIDEO_FIELDS + ['video_order', 'updated_at'], batch_size=batch_size)
+
+    stats['courses_created'] += len(new_courses)
+    stats['courses_updated'] += len(changed_courses)
+    stats['videos_created'] += len(new_videos)
+    stats['videos_updated'] += len(changed_videos)
+    changed_course_ids = {course.pk for course in new_courses + changed_courses}
+    changed_course_ids |= {video.course_id for video in new_videos + changed_videos}
+    return changed_course_ids, {video.pk for video in changed_videos}, {video.course_id for video in new_videos}
+
+
+def import_catalog(courses, batch_size=500):
+    """Validate and upsert `courses` (as read by read_manifest); returns created/updated counts."""
+    validated = validate(courses)
+    stats = dict.fromkeys(['courses_created', 'courses_updated', 'videos_created', 'videos_updated'], 0)
+    changed_courses, changed_videos, recount = set(), set(), set()
+    for start in range(0, len(validated), batch_size):
+        with transaction.atomic():
+            batch_courses, batch_videos, batch_recount = _import_batch(validated[start:start + batch_size],
+                                                                       batch_size, stats)
+            # Reindexed in the batch's transaction, so search never sees half an import
+            search.index(Course.objects.filter(pk__in=batch_courses))
+            search.index(Video.objects.filter(course_id__in=batch_courses))
+        changed_courses |= batch_courses
+        changed_videos |= batch_videos
+        recount |= batch_recount
+
+    # Bulk writes skip the model signals: invalidate the caches and recount progress here
+    if changed_courses:
+        cache.bump_version_on_commit(cache.CATALOG)
+    for course_id in changed_courses:
+        cache.bump_version_on_commit(cache.course_scope(course_id))
+    for video_id in changed_videos:
+        cache.bump_version_on_commit(cache.video_scope(video_id))
+    if recount:
+        progress.rebuild_progress(Enrollment.objects.filter(course_id__in=recount))
+    return stats
+
+
+def export_catalog():
+    """The catalog as a manifest: courses oldest first, each with its videos in order."""
+    courses = Course.objects.order_by('created_at', 'id').prefetch_related('videos')
+    return [
+        {
+            **{field: getattr(course, field) for field in COURSE_FIELDS},
+            'videos': [
+                {
+                    **{field: getattr(video, field) for field in VIDEO_FIELDS},
+                    'duration': duration_string(video.duration) if video.duration else None,
+                }
+                for video in sorted(course.videos.all(), key=lambda video: (video.video_order, str(video.pk)))
+            ],
+        }
+        for course in courses
+    ]
+
+
+def write_manifest(courses, file, manifest_format):
+    if manifest_format == 'json':
+        json.dump(courses, file, indent=2, ensure_ascii=False)
+        file.write('\n')
+        return
+    writer = csv.writer(file)
+    writer.writerow(CSV_COLUMNS)
+    for course in courses:
+        course_values = [course[field] for field in COURSE_FIELDS]
+        for video in course['videos'] or [dict.fromkeys(VIDEO_FIELDS)]:
+            writer.writerow(['' if value is None else value
+                             for value in course_values + [video[field] for field in VIDEO_FIELDS]])
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core import checks
+
+# Backends whose entries live in one process; a write in one worker is invisible to the others
+LOCAL_CACHE_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def cache_is_shared():
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+def single_process():
+    """DEBUG (runserver) and test runs are the setups where a per-process cache is acceptable."""
+    return settings.DEBUG or settings.TESTING
+
+
+def enrollment_cache_enabled():
+    """
+    Whether enrollment checks use the cached sets: COURSES_ENROLLMENT_CACHE, except on a
+    per-process cache outside DEBUG and tests, where they fall back to the database (courses.W002).
+    """
+    return settings.COURSES_ENROLLMENT_CACHE and (cache_is_shared() or single_process())
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Cached payloads and ETags are invalidated by version bumps that only a shared cache spreads."""
+    if cache_is_shared() or single_process() or settings.COURSES_CACHE_TIMEOUT == 0:
+        return []
+    return [checks.Warning(
+        "The course cache uses a per-process cache backend, so after a write other workers keep serving "
+        "the old payloads (and answering 304 to their ETags) for up to COURSES_CACHE_TIMEOUT seconds.",
+        hint="Set CACHE_BACKEND/CACHE_LOCATION to a shared cache (Redis or the database cache) when running "
+             "several processes, or COURSES_CACHE_TIMEOUT=0 to turn payload caching off.",
+        id='courses.W001',
+    )]
+
+
+@checks.register(checks.Tags.caches)
+def check_enrollment_cache(app_configs, **kwargs):
+    """A stale enrollment set grants or denies access, so it is only cached in a shared cache."""
+    if not settings.COURSES_ENROLLMENT_CACHE or enrollment_cache_enabled():
+        return []
+    return [checks.Warning(
+        "COURSES_ENROLLMENT_CACHE is on but the cache backend is per-process, so enrollment checks query "
+        "the database on every request instead.",
+        hint="Set CACHE_BACKEND/CACHE_LOCATION to a shared cache (Redis or the database cache) to cache "
+             "enrollment sets, or COURSES_ENROLLMENT_CACHE=False to silence this warning.",
+        id='courses.W002',
+    )]
@@ -0,0 +1,46 @@
+"""
+Conditional GET for the read-only course endpoints.
+
+Validators come from Max(updated_at) and Count() over the rows behind a response, so
+any save, insert or delete changes them, and they are computed without building or
+serializing the body. They are cached next to the payloads (same scope and version),
+so a revalidation that ends in 304 usually costs no query at all.
+"""
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from . import cache
+
+
+def make_validators(last_modified, count, variant=''):
+    """ETag and Last-Modified (a timestamp) for `count` rows last changed at `last_modified`."""
+    stamp = last_modified.isoformat() if last_modified else ''
+    digest = hashlib.md5(f"{count}:{stamp}:{variant}".encode()).hexdigest()
+    return {
+        # Weak: the JSON and browsable renderings of a payload share it
+        'etag': f'W/"{digest}"',
+        'last_modified': int(last_modified.timestamp()) if last_modified else None,
+    }
+
+
+def get_validators(scope, name, queryset, variant=''):
+    """Validators for the rows of `queryset`, read through the `scope` cache."""
+    def build():
+        stats = queryset.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        return make_validators(stats['last_modified'], stats['count'], variant)
+    return cache.get_or_set(scope, f"validators:{name}:{variant}", build)
+
+
+def set_validators(response, validators):
+    response['ETag'] = validators['etag']
+    if validators['last_modified'] is not None:
+        response['Last-Modified'] = http_date(validators['last_modified'])
+    return response
+
+
+def not_modified(request, validators):
+    """A 304 (or 412) response if the request's preconditions match `validators`, else None."""
+    response = get_conditional_response(request, etag=validators['etag'],
+                                        last_modified=validators['last_modified'])
+    return set_validators(response, validators) if response is not None else None
@@ -0,0 +1,105 @@
+"""
+Streaming exports of watch history and enrollments for analytics.
+
+Rows are read with values_list().iterator(chunk_size=EXPORT_CHUNK_SIZE), which is a
+server-side cursor on PostgreSQL, and encoded one line at a time, so memory stays
+flat however many rows are exported. An export covers updated_at in (since, until];
+`until` is fixed when the export starts and is the `since` of the next incremental
+run.
+
+updated_at is set when a row is written, not when its transaction commits, so a row
+stamped just before `until` may only become visible after the export read past it.
+`until` therefore trails the clock by EXPORT_WATERMARK_LAG seconds, which must exceed
+the longest write transaction. A row changed again shows up in a later export too,
+so consumers must dedupe by id, keeping the latest updated_at.
+"""
+import csv
+import datetime
+import decimal
+import json
+import uuid
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Enrollment, WatchHistory
+
+DATASETS = {
+    'watch-history': (WatchHistory, [
+        'id', 'user_id', 'course_id', 'video_id', 'last_watched_time', 'watched_status', 'updated_at',
+    ]),
+    'enrollments': (Enrollment, [
+        'id', 'user_id', 'course_id', 'status', 'completion_percentage', 'completion_date', 'enrollment_date',
+        'last_watched_video', 'videos_watched', 'total_videos', 'seconds_watched', 'updated_at',
+    ]),
+}
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def _encode(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class _Echo:
+    """File-like object whose write() hands back the line csv.writer produced."""
+
+    def write(self, value):
+        return value
+
+
+def rows(dataset, since=None, until=None):
+    """Values tuples of `dataset` changed in (since, until], oldest first."""
+    model, fields = DATASETS[dataset]
+    queryset = model.objects.order_by('updated_at', 'id')
+    if since is not None:
+        queryset = queryset.filter(updated_at__gt=since)
+    if until is not None:
+        queryset = queryset.filter(updated_at__lte=until)
+    return queryset.values_list(*fields).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+def lines(dataset, output='ndjson', since=None, until=None):
+    """Encoded lines (str) of an export; CSV starts with a header row."""
+    fields = DATASETS[dataset][1]
+    if output == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows(dataset, since, until):
+            yield writer.writerow(['' if value is None else value if isinstance(value, (str, int, float))
+                                   else _encode(value) for value in row])
+    else:
+        for row in rows(dataset, since, until):
+            yield json.dumps(dict(zip(fields, row)), default=_encode, separators=(',', ':')) + '\n'
+
+
+def blocks(lines, size=64 * 1024):
+    """Join lines into blocks of about `size` characters, so responses aren't written a line at a time."""
+    block, length = [], 0
+    for line in lines:
+        block.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(block)
+            block, length = [], 0
+    if block:
+        yield ''.join(block)
+
+
+def watermark():
+    """The `until` of an export starting now: EXPORT_WATERMARK_LAG seconds ago."""
+    return timezone.now() - datetime.timedelta(seconds=settings.EXPORT_WATERMARK_LAG)
+
+
+def format_watermark(value):
+    return value.isoformat().replace('+00:00', 'Z')
+
+
+def parse_watermark(value):
+    """An aware datetime from an ISO 8601 watermark (naive ones are in the current timezone)."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid watermark: {value!r}")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
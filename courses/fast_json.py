@@ -0,0 +1,105 @@
+"""
+Opt-in fast path (COURSES_FAST_JSON) for the large list endpoints.
+
+Instead of building model instances and walking them field by field through a
+ModelSerializer, rows are fetched with .values() for the fields the serializer
+declares, and each column goes through one converter picked once per serializer
+class. The values match the serializer's to_representation(), and they are plain
+JSON types, so JSONRenderer's C encoder never falls back to default() and writes
+the same bytes as before.
+"""
+import functools
+import uuid
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation() is the identity (or a cheap cast) for database values
+_PLAIN_FIELDS = (serializers.CharField, serializers.ChoiceField)
+_CASTS = ((serializers.BooleanField, bool), (serializers.IntegerField, int), (serializers.FloatField, float))
+
+
+def _related_pk(value):
+    return str(value) if isinstance(value, uuid.UUID) else value
+
+
+def _fixed(convert):
+    return lambda: convert
+
+
+def _datetime(field):
+    """DateTimeField.to_representation for ISO 8601, with the timezone looked up once per list."""
+    def make():
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+        def convert(value):
+            text = value.astimezone(field_timezone).isoformat()
+            return text[:-6] + 'Z' if text.endswith('+00:00') else text
+        return convert
+    return make
+
+
+def _converter(field):
+    """A callable returning the column's converter (None for the identity) for one list."""
+    if isinstance(field, _PLAIN_FIELDS) or (isinstance(field, serializers.JSONField) and not field.binary):
+        return _fixed(None)
+    for field_class, cast in _CASTS:
+        if isinstance(field, field_class):
+            return _fixed(cast)
+    if isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None:
+        return _fixed(_related_pk)
+    if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField,
+                          serializers.RelatedField, serializers.SerializerMethodField)):
+        raise ImproperlyConfigured(f"{type(field).__name__} '{field.field_name}' needs model instances.")
+    if (isinstance(field, serializers.DateTimeField) and settings.USE_TZ
+            and str(getattr(field, 'format', api_settings.DATETIME_FORMAT)).lower() == ISO_8601):
+        return _datetime(field)  # Database values are aware
+    # Dates, decimals, durations, UUIDs: the field's own formatting, minus the object walk
+    return _fixed(field.to_representation)
+
+
+@functools.cache
+def columns(serializer_class):
+    """(output name, values() lookup, converter factory) for each field of `serializer_class`."""
+    return tuple(
+        (name, '__'.join(field.source_attrs), _converter(field))
+        for name, field in serializer_class().fields.items()
+        if not field.write_only
+    )
+
+
+def values(queryset, serializer_class, *extra):
+    """`queryset` as values() rows holding what `serializer_class` renders (plus `extra` lookups)."""
+    lookups = [lookup for _, lookup, _ in columns(serializer_class)]
+    return queryset.values(*dict.fromkeys(lookups + list(extra)))
+
+
+def to_representation(rows, serializer_class):
+    """The serializer's output for rows from values()."""
+    cols = [(name, lookup, make()) for name, lookup, make in columns(serializer_class)]
+    return [
+        {
+            name: value if convert is None or value is None else convert(value)
+            for name, lookup, convert in cols
+            for value in (row[lookup],)
+        }
+        for row in rows
+    ]
+
+
+def list_data(queryset, serializer_class, paginator, request):
+    """
+    Data for a list response, paginated by `paginator` if the request asks for a page;
+    from values() rows when COURSES_FAST_JSON is on, from `serializer_class` otherwise.
+    """
+    fast = settings.COURSES_FAST_JSON
+    if fast:
+        queryset = values(queryset, serializer_class, *paginator.ordering)
+    page = paginator.paginate_queryset(queryset, request)
+    objects = queryset if page is None else page
+    data = to_representation(objects, serializer_class) if fast else serializer_class(objects, many=True).data
+    if page is None:
+        return data
+    return paginator.get_paginated_response(data).data
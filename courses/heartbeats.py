@@ -0,0 +1,230 @@
+import atexit
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from uuid import UUID
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections, transaction
+from .models import Video, WatchHistory
+from .progress import apply_watch_changes
+from .utils import validate_uuid
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Heartbeat:
+    course_id: str
+    last_watched_time: float
+    watched_status: bool
+
+
+def read_batch(heartbeats):
+    """
+    The heartbeats of a batch request (entries that aren't objects become empty ones)
+    and the valid video IDs they name; raises ValueError for a malformed batch.
+    """
+    if not isinstance(heartbeats, list) or not heartbeats:
+        raise ValueError("A non-empty list of heartbeats is required.")
+    if len(heartbeats) > settings.WATCH_HISTORY_BATCH_MAX:
+        raise ValueError(f"At most {settings.WATCH_HISTORY_BATCH_MAX} heartbeats are allowed per request.")
+    heartbeats = [heartbeat if isinstance(heartbeat, dict) else {} for heartbeat in heartbeats]
+    return heartbeats, {validate_uuid(heartbeat.get('video_id')) for heartbeat in heartbeats} - {None}
+
+
+def sort_batch(heartbeats, video_courses, enrolled_course_ids):
+    """
+    Split heartbeats into accepted (video ID, Heartbeat) pairs and rejections, given
+    the course of each known video and the courses the user is enrolled in.
+    """
+    accepted, rejected = [], []
+    for heartbeat in heartbeats:
+        video_id = heartbeat.get('video_id')
+        video_uuid = validate_uuid(video_id)
+        if not video_uuid:
+            rejected.append({"video_id": video_id, "error": "Invalid video ID format."})
+            continue
+        course_id = video_courses.get(video_uuid)
+        if not course_id:
+            rejected.append({"video_id": video_id, "error": "Video not found."})
+            continue
+        if course_id not in enrolled_course_ids:
+            rejected.append({"video_id": video_id, "error": "User not enrolled in this course."})
+            continue
+        try:
+            last_watched_time = float(heartbeat.get('last_watched_time'))
+        except (TypeError, ValueError):
+            rejected.append({"video_id": video_id, "error": "Last watched time is required."})
+            continue
+        if not math.isfinite(last_watched_time):  # float() takes "nan" and "inf"
+            rejected.append({"video_id": video_id, "error": "Last watched time must be a finite number."})
+            continue
+        try:
+            # Same coercion as update_watch_history, so "False" and "0" mean not watched
+            watched_status = WatchHistory._meta.get_field('watched_status').to_python(
+                heartbeat.get('watched_status', False))
+        except ValidationError:
+            rejected.append({"video_id": video_id, "error": "Invalid watched status."})
+            continue
+
+        accepted.append((video_uuid, Heartbeat(
+            course_id=course_id,
+            last_watched_time=last_watched_time,
+            watched_status=watched_status,
+        )))
+    return accepted, rejected
+
+
+class WatchHistoryBuffer:
+    """
+    Coalesces watch-progress heartbeats in process memory, keeping only the latest
+    position per (user, video), and writes them with one bulk upsert per flush.
+
+    A flush happens every WATCH_HISTORY_FLUSH_INTERVAL seconds from a background
+    thread (0 disables it), early when the buffer reaches WATCH_HISTORY_FLUSH_SIZE
+    entries, and at interpreter exit. Early flushes run on the background thread, so
+    the request that filled the buffer doesn't pay for (or fail with) the bulk write.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._wake = threading.Event()
+
+    def add(self, user_id, video_id, heartbeat):
+        with self._lock:
+            # Re-insert so the pending order is heartbeat order; the latest one sets the resume index
+            self._pending.pop((user_id, str(video_id)), None)
+            self._pending[(user_id, str(video_id))] = heartbeat
+            size = len(self._pending)
+        self._start_flusher()
+        if size < settings.WATCH_HISTORY_FLUSH_SIZE:
+            return
+        if self._flusher is not None:
+            self._wake.set()
+            return
+        # No background thread: flush here, but the heartbeats are buffered either way
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush buffered watch history")
+
+    def get(self, user_id, video_id):
+        """The buffered (not yet written) heartbeat for a user and video, if any."""
+        with self._lock:
+            return self._pending.get((user_id, str(video_id)))
+
+    def flush(self):
+        """Write all buffered heartbeats; returns the number of rows upserted."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        rows = [
+            WatchHistory(
+                user_id=user_id,
+                video_id=video_id,
+                course_id=heartbeat.course_id,
+                last_watched_time=heartbeat.last_watched_time,
+                watched_status=heartbeat.watched_status,
+            )
+            for (user_id, video_id), heartbeat in pending.items()
+        ]
+        try:
+            with transaction.atomic():
+                return self._write(rows)
+        except Exception:
+            # Put the batch back unless a newer heartbeat arrived meanwhile
+            with self._lock:
+                for key, heartbeat in pending.items():
+                    self._pending.setdefault(key, heartbeat)
+            raise
+
+    def _write(self, rows):
+        """
+        Upsert `rows` and move the enrollment counters by the difference; returns the
+        number of rows written. Runs in one transaction with the stored state locked,
+        so concurrent flushes of the same (user, video) in other processes can't both
+        count it as newly watched.
+        """
+        rows = self._live(rows)
+        if not rows:
+            return 0
+        self._insert_missing(rows)
+        previous = self._previous_state(rows)
+        self._upsert(rows)
+        apply_watch_changes(
+            (row.user_id, row.course_id, row.video_id, *previous[(row.user_id, row.video_id)],
+             row.last_watched_time, row.watched_status)
+            for row in rows
+        )
+        return len(rows)
+
+    def _live(self, rows):
+        """
+        The rows whose user and video still exist. Foreign keys are only checked at commit,
+        so one row of a user or video deleted after its heartbeat was accepted would fail
+        the whole flush, and every later one, since failed batches go back into the buffer.
+        """
+        live_videos = set(Video.objects.filter(id__in={row.video_id for row in rows}).values_list('id', flat=True))
+        live_users = set(User.objects.filter(id__in={row.user_id for row in rows}).values_list('id', flat=True))
+        live, dropped = [], []
+        for row in rows:
+            (live if UUID(row.video_id) in live_videos and row.user_id in live_users else dropped).append(row)
+        if dropped:
+            logger.warning("Dropped buffered heartbeats of deleted users or videos: %s",
+                           [(row.user_id, row.video_id) for row in dropped])
+        return live
+
+    def _insert_missing(self, rows):
+        """Create missing rows as unwatched at 0s, the state a new row's changes are counted from."""
+        WatchHistory.objects.bulk_create([
+            WatchHistory(user_id=row.user_id, video_id=row.video_id, course_id=row.course_id,
+                         last_watched_time=0, watched_status=False)
+            for row in rows
+        ], ignore_conflicts=True)
+
+    def _previous_state(self, rows):
+        """Stored (last_watched_time, watched_status) of the rows about to be overwritten, locked until commit."""
+        existing = WatchHistory.objects.select_for_update().filter(
+            user_id__in={row.user_id for row in rows},
+            video_id__in={row.video_id for row in rows},
+        ).values_list('user_id', 'video_id', 'last_watched_time', 'watched_status')
+        return {(user_id, str(video_id)): (time, watched) for user_id, video_id, time, watched in existing}
+
+    def _upsert(self, rows):
+        WatchHistory.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user', 'video'],
+            update_fields=['course', 'last_watched_time', 'watched_status', 'updated_at'],
+        )
+
+    def _start_flusher(self):
+        interval = settings.WATCH_HISTORY_FLUSH_INTERVAL
+        if self._flusher is not None or interval <= 0:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, args=(interval,), daemon=True)
+                self._flusher.start()
+
+    def _run_flusher(self, interval):
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered watch history")
+            finally:
+                close_old_connections()
+
+
+watch_history_buffer = WatchHistoryBuffer()
+atexit.register(watch_history_buffer.flush)
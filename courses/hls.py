@@ -0,0 +1,125 @@
+"""
+HLS packaging: one ffmpeg run transcodes a video into the renditions of
+VIDEO_HLS_RENDITIONS that fit its height, cuts them into VIDEO_HLS_SEGMENT_SECONDS
+segments and writes a master playlist, under MEDIA_ROOT/hls/<video id>/. The
+playlists are served by the enrollment-checked asset view (see courses.media), not
+from MEDIA_URL.
+
+Packaging is queued on the ingestion worker pool once a video has been probed (see
+courses.ingestion); the package_hls command runs it for existing videos.
+"""
+import os
+import re
+import shutil
+import subprocess
+from django.conf import settings
+from django.core.files.storage import default_storage
+from . import media
+
+STREAM_RE = re.compile(r'Stream #\d+:\d+.*?: (Video|Audio): (.*)')
+FRAME_SIZE_RE = re.compile(r', (\d+)x(\d+)')
+
+
+def _ffmpeg():
+    import imageio_ffmpeg
+
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def inspect(path):
+    """(height of the first video stream, whether there is an audio stream) of a media file."""
+    # `ffmpeg -i` without an output prints the stream list and exits non-zero
+    stderr = subprocess.run([_ffmpeg(), '-hide_banner', '-i', path], capture_output=True, text=True).stderr
+    height, audio = None, False
+    for kind, details in STREAM_RE.findall(stderr):
+        if kind == 'Audio':
+            audio = True
+        elif height is None and (size := FRAME_SIZE_RE.search(details)):
+            height = int(size.group(2))
+    if height is None:
+        raise ValueError("No video stream found.")
+    return height, audio
+
+
+def select_renditions(source_height):
+    """The configured renditions not taller than the source (at least the smallest one)."""
+    renditions = sorted(settings.VIDEO_HLS_RENDITIONS, key=lambda rendition: rendition['height'])
+    fitting = [rendition for rendition in renditions if rendition['height'] <= source_height]
+    return fitting or renditions[:1]
+
+
+def build_command(source, output_dir, renditions, audio):
+    """ffmpeg arguments producing every rendition in one decode pass (split + var_stream_map)."""
+    count = len(renditions)
+    splits = ''.join(f'[v{index}]' for index in range(count))
+    scales = ';'.join(
+        f"[v{index}]scale=-2:{rendition['height']}[v{index}out]" for index, rendition in enumerate(renditions)
+    )
+    command = [
+        _ffmpeg(), '-hide_banner', '-loglevel', 'error', '-y', '-i', source,
+        '-filter_complex', f'[0:v]split={count}{splits};{scales}',
+    ]
+    stream_map = []
+    for index, rendition in enumerate(renditions):
+        bitrate = rendition['video_bitrate']
+        command += [
+            '-map', f'[v{index}out]',
+            f'-c:v:{index}', 'libx264', f'-b:v:{index}', f'{bitrate}k',
+            f'-maxrate:v:{index}', f'{int(bitrate * 1.07)}k', f'-bufsize:v:{index}', f'{int(bitrate * 1.5)}k',
+        ]
+        streams = f'v:{index}'
+        if audio:
+            command += ['-map', 'a:0', f'-c:a:{index}', 'aac', f'-b:a:{index}', f"{rendition['audio_bitrate']}k"]
+            streams += f',a:{index}'
+        stream_map.append(f"{streams},name:{rendition['name']}")
+
+    # Fixed GOPs aligned to the segment length, so every segment starts on a keyframe
+    segment = settings.VIDEO_HLS_SEGMENT_SECONDS
+    command += [
+        '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+        '-force_key_frames', f'expr:gte(t,n_forced*{segment})', '-sc_threshold', '0',
+        '-f', 'hls', '-hls_time', str(segment), '-hls_playlist_type', 'vod',
+        '-hls_segment_filename', os.path.join(output_dir, '%v', 'segment_%04d.ts'),
+        '-master_pl_name', 'master.m3u8',
+        '-var_stream_map', ' '.join(stream_map),
+        os.path.join(output_dir, '%v', 'index.m3u8'),
+    ]
+    return command
+
+
+def package(video, source):
+    """Package the stored file `source` for `video` and record the result on the video."""
+    video.hls_status = 'processing'
+    video.save(update_fields=['hls_status', 'updated_at'])
+    output_name = f"hls/{video.pk}"
+    output_dir = default_storage.path(output_name)
+    try:
+        path = default_storage.path(source)
+        height, audio = inspect(path)
+        renditions = select_renditions(height)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        for rendition in renditions:
+            os.makedirs(os.path.join(output_dir, rendition['name']))
+        result = subprocess.run(build_command(path, output_dir, renditions, audio),
+                                capture_output=True, text=True)
+        if result.returncode:
+            raise RuntimeError(f"ffmpeg exited with {result.returncode}: {result.stderr.strip()[-500:]}")
+    except Exception:
+        video.hls_status = 'failed'
+        video.save(update_fields=['hls_status', 'updated_at'])
+        raise
+
+    video.hls_status = 'ready'
+    video.hls_master_url = media.asset_url(video.pk, 'hls/master.m3u8')
+    video.hls_renditions = [
+        {
+            'name': rendition['name'],
+            'height': rendition['height'],
+            'bandwidth': (rendition['video_bitrate'] + rendition['audio_bitrate']) * 1000,
+            'url': media.asset_url(video.pk, f"hls/{rendition['name']}/index.m3u8"),
+        }
+        for rendition in renditions
+    ]
+    # save() so the cached video payloads pick up the new fields
+    video.save(update_fields=['hls_status', 'hls_master_url', 'hls_renditions', 'updated_at'])
+    return video
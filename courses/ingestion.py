@@ -0,0 +1,120 @@
+"""
+Background ingestion of uploaded videos.
+
+upload_video stores the file and queues an IngestionJob; a process-wide thread pool
+then probes the file with ffmpeg (through imageio-ffmpeg), writes Video.duration
+back and queues thumbnail/poster generation (courses.thumbnails) and HLS packaging
+(courses.hls). Jobs left queued by a restarted process are picked up by the
+process_ingestion_jobs command, which also requeues jobs stuck in 'processing' for
+longer than VIDEO_INGESTION_STALE_AFTER seconds (their worker died).
+
+A job is claimed with a conditional UPDATE, so the worker pool and the command
+never process the same job twice.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from . import hls, thumbnails
+from .models import IngestionJob
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.VIDEO_INGESTION_WORKERS,
+                                           thread_name_prefix='video-ingestion')
+        return _executor
+
+
+def create_job(video, source, uploader_id=None):
+    """Queue ingestion of the stored file `source` for `video`; returns the job."""
+    job = IngestionJob.objects.create(video=video, source=source, uploader_id=uploader_id)
+    enqueue(job)
+    return job
+
+
+def enqueue(job):
+    """Process `job` on the worker pool once the current transaction commits."""
+    enqueue_task(process_job, job.pk)
+
+
+def enqueue_task(task, *args):
+    """Run task(*args) on the worker pool once the current transaction commits."""
+    transaction.on_commit(lambda: _get_executor().submit(_run, task, *args))
+
+
+def enqueue_hls(video, source):
+    """Package `video` for HLS on the worker pool once the current transaction commits."""
+    video.hls_status = 'pending'
+    video.save(update_fields=['hls_status', 'updated_at'])
+    enqueue_task(hls.package, video, source)
+
+
+def _run(task, *args):
+    try:
+        task(*args)
+    except Exception:
+        logger.exception("Video processing task %s%r failed", task.__name__, args)
+    finally:
+        close_old_connections()
+
+
+def requeue_stale_jobs():
+    """Queue again the jobs left 'processing' by a worker that died; returns how many."""
+    cutoff = timezone.now() - timedelta(seconds=settings.VIDEO_INGESTION_STALE_AFTER)
+    return IngestionJob.objects.filter(status='processing', updated_at__lt=cutoff).update(
+        status='queued', updated_at=timezone.now())
+
+
+def probe(path):
+    """ffmpeg's stream metadata for a local file: duration (seconds), size, fps, codec."""
+    import imageio_ffmpeg
+
+    frames = imageio_ffmpeg.read_frames(path)
+    try:
+        return next(frames)
+    finally:
+        frames.close()
+
+
+def process_job(job_id):
+    """Probe the job's file, fill in the video's duration and queue its media processing; returns the job."""
+    claimed = IngestionJob.objects.filter(pk=job_id, status__in=('queued', 'failed')).update(
+        status='processing', updated_at=timezone.now())
+    job = IngestionJob.objects.select_related('video').get(pk=job_id)
+    if not claimed:
+        return job  # Done, or being processed by another worker
+
+    video = job.video
+    try:
+        path = default_storage.path(job.source)
+        meta = probe(path)
+        duration = meta.get('duration') or 0
+        if duration:
+            video.duration = timedelta(seconds=duration)
+            # save() rather than update(), so the video caches are invalidated
+            video.save(update_fields=['duration', 'updated_at'])
+    except Exception as exc:
+        job.status = 'failed'
+        job.error = f"{type(exc).__name__}: {exc}"
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        raise
+
+    job.status = 'done'
+    job.error = None
+    job.save(update_fields=['status', 'error', 'updated_at'])
+    enqueue_task(thumbnails.generate, video, job.source)
+    if settings.VIDEO_HLS_ENABLED:
+        enqueue_hls(video, job.source)
+    return job
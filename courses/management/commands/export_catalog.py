@@ -0,0 +1,22 @@
+import io
+from django.core.management.base import BaseCommand
+from courses import catalog
+
+
+class Command(BaseCommand):
+    help = "Write every course and its videos as a manifest that import_catalog reads back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['json', 'csv'], default='json', dest='manifest_format')
+        parser.add_argument('--file', help="Write to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        courses = catalog.export_catalog()
+        if options['file']:
+            with open(options['file'], 'w', newline='', encoding='utf-8') as file:
+                catalog.write_manifest(courses, file, options['manifest_format'])
+        else:
+            output = io.StringIO()
+            catalog.write_manifest(courses, output, options['manifest_format'])
+            self.stdout.write(output.getvalue(), ending='')
+        self.stderr.write(f"Exported {len(courses)} courses.")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from courses import media, thumbnails
+from courses.models import Video
+
+
+class Command(BaseCommand):
+    help = "Generate scrub-preview sprite sheets (and missing posters) for videos stored under MEDIA_ROOT."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--video', action='append', dest='videos', metavar='VIDEO_ID',
+                            help="Only process this video (repeatable).")
+        parser.add_argument('--all', action='store_true',
+                            help="Regenerate thumbnails for videos that already have them, too.")
+
+    def handle(self, *args, **options):
+        videos = Video.objects.all()
+        if options['videos']:
+            videos = videos.filter(id__in=options['videos'])
+        elif not options['all']:
+            videos = videos.filter(thumbnails_vtt_url__isnull=True)
+
+        generated = failed = 0
+        for video in videos.iterator():
+            source = media.storage_name(video.video_url)
+            if source is None:
+                continue  # Hosted elsewhere
+            try:
+                thumbnails.generate(video, source)
+                generated += 1
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Video {video.id} failed: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Generated thumbnails for {generated} videos, {failed} failed."))
@@ -0,0 +1,38 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from courses import catalog
+
+
+class Command(BaseCommand):
+    help = "Create or update courses and videos from a JSON or CSV manifest (see courses.catalog)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', help="Path to a .json or .csv manifest.")
+        parser.add_argument('--format', choices=['json', 'csv'], dest='manifest_format',
+                            help="Manifest format (default: from the file extension).")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Courses per transaction, and rows per INSERT/UPDATE (default 500).")
+        parser.add_argument('--dry-run', action='store_true', help="Validate and count, then roll back.")
+
+    def handle(self, *args, **options):
+        manifest_format = options['manifest_format'] or os.path.splitext(options['manifest'])[1].lstrip('.').lower()
+        if manifest_format not in ('json', 'csv'):
+            raise CommandError("Pass --format json or --format csv.")
+        try:
+            with open(options['manifest'], newline='', encoding='utf-8') as file:
+                courses = catalog.read_manifest(file, manifest_format)
+            if options['dry_run']:
+                with transaction.atomic():
+                    stats = catalog.import_catalog(courses, batch_size=options['batch_size'])
+                    transaction.set_rollback(True)
+            else:
+                stats = catalog.import_catalog(courses, batch_size=options['batch_size'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would create' if options['dry_run'] else 'Created'} {stats['courses_created']} courses "
+            f"and {stats['videos_created']} videos, updated {stats['courses_updated']} courses "
+            f"and {stats['videos_updated']} videos."
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from courses import hls, media
+from courses.models import Video
+
+
+class Command(BaseCommand):
+    help = "Package videos whose file is stored under MEDIA_ROOT as multi-rendition HLS."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--video', action='append', dest='videos', metavar='VIDEO_ID',
+                            help="Only package this video (repeatable).")
+        parser.add_argument('--all', action='store_true',
+                            help="Repackage videos that are already packaged, too.")
+
+    def handle(self, *args, **options):
+        videos = Video.objects.all()
+        if options['videos']:
+            videos = videos.filter(id__in=options['videos'])
+        elif not options['all']:
+            videos = videos.exclude(hls_status='ready')
+
+        packaged = failed = 0
+        for video in videos.iterator():
+            source = media.storage_name(video.video_url)
+            if source is None:
+                continue  # Hosted elsewhere
+            try:
+                hls.package(video, source)
+                packaged += 1
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Video {video.id} failed: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Packaged {packaged} videos, {failed} failed."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from courses.ingestion import process_job, requeue_stale_jobs
+from courses.models import IngestionJob
+
+
+class Command(BaseCommand):
+    help = ("Run video ingestion jobs that are still queued, or stuck processing (e.g. after a restart), "
+            "optionally retrying failed ones.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help="Also rerun jobs that failed.")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} jobs stuck processing.")
+        statuses = ['queued', 'failed'] if options['retry_failed'] else ['queued']
+        done = failed = 0
+        for job_id in IngestionJob.objects.filter(status__in=statuses).order_by('created_at').values_list('id', flat=True):
+            try:
+                process_job(job_id)
+                done += 1
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Job {job_id} failed: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} ingestion jobs, {failed} failed."))
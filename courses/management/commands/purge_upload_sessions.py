@@ -0,0 +1,25 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from courses import uploads
+from courses.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Delete resumable upload sessions that were abandoned, together with their part files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24,
+                            help="Purge open sessions without activity for this many hours (default 24).")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        # Chunk uploads don't touch the session row, so use the latest chunk as the activity time
+        stale = [
+            session for session in UploadSession.objects.filter(status='open', updated_at__lt=cutoff)
+            if not session.chunks.filter(received_at__gte=cutoff).exists()
+        ]
+        for session in stale:
+            uploads.discard(session)
+            session.delete()
+        self.stdout.write(self.style.SUCCESS(f"Purged {len(stale)} upload sessions."))
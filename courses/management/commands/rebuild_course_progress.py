@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from courses.models import Enrollment
+from courses.progress import rebuild_progress
+
+
+class Command(BaseCommand):
+    help = "Recompute the enrollment progress counters and resume positions from watch history and videos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', action='append', dest='courses', metavar='COURSE_ID',
+                            help="Only rebuild enrollments of this course (repeatable).")
+
+    def handle(self, *args, **options):
+        enrollments = Enrollment.objects.all()
+        if options['courses']:
+            enrollments = enrollments.filter(course_id__in=options['courses'])
+        rebuilt = rebuild_progress(enrollments)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt progress for {rebuilt} enrollments."))
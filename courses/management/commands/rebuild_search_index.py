@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from courses import search
+from courses.models import Course, Video
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of courses and videos."
+
+    def handle(self, *args, **options):
+        search.index(Course.objects.all())
+        search.index(Video.objects.all())
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {Course.objects.count()} courses and {Video.objects.count()} videos."
+        ))
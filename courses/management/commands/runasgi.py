@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Serve ELearning.asgi with uvicorn, e.g. to run the async/ endpoints locally or benchmark one ASGI worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument('addrport', nargs='?', default='127.0.0.1:8000', help="host:port to listen on.")
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--reload', action='store_true', help="Restart when code changes (single worker).")
+        parser.add_argument('--log-level', default='info')
+
+    def handle(self, *args, **options):
+        try:
+            import uvicorn
+        except ImportError:
+            raise CommandError("runasgi needs uvicorn: pip install uvicorn")
+
+        host, _, port = options['addrport'].rpartition(':')
+        if not port.isdigit():
+            raise CommandError(f"Invalid address: {options['addrport']!r} (expected host:port).")
+        uvicorn.run(
+            'ELearning.asgi:application',
+            host=host or '127.0.0.1',
+            port=int(port),
+            workers=options['workers'],
+            reload=options['reload'],
+            log_level=options['log_level'],
+            lifespan='off',  # Django doesn't implement the lifespan protocol
+        )
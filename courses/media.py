@@ -0,0 +1,169 @@
+"""
+Delivery of locally stored media (videos, posters) with HTTP caching and byte ranges.
+
+Full files go out as a FileResponse, which WSGI servers with a file wrapper (gunicorn)
+send with sendfile(). A single byte range is served from the same file handle
+positioned at the range start, so it can be sent the same way. With
+MEDIA_ACCEL_REDIRECT_PREFIX set, the file is handed to nginx via X-Accel-Redirect
+instead, and nginx does the range and sendfile work.
+
+Files generated per video (HLS playlists and segments, thumbnail sprites) live in the video's asset
+directories, <directory>/<video id>/, and are only linked through the
+enrollment-checked get_video_asset view, never through MEDIA_URL.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from stat import S_ISREG
+from urllib.parse import unquote
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ASSET_DIRECTORIES = ('hls', 'thumbnails')
+# Types mimetypes doesn't know (or knows differently: .ts is a Qt translation file there)
+CONTENT_TYPES = {'.m3u8': 'application/vnd.apple.mpegurl', '.ts': 'video/mp2t'}
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileRange:
+    """Read-only view of `length` bytes of an open file from its current position."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def storage_name(url):
+    """Storage name of a media URL served from MEDIA_URL, or None for anything else."""
+    if url and url.startswith(settings.MEDIA_URL):
+        return unquote(url[len(settings.MEDIA_URL):])
+    return None
+
+
+def asset_name(video_id, path):
+    """
+    Storage name of `path` (e.g. 'hls/360p/index.m3u8') in the asset directories of a
+    video, or None if it isn't in one of them.
+    """
+    directory, _, rest = path.partition('/')
+    if directory not in ASSET_DIRECTORIES or not rest:
+        return None
+    prefix = f"{directory}/{video_id}/"
+    name = posixpath.normpath(prefix + rest)
+    return name if name.startswith(prefix) else None
+
+
+def asset_url(video_id, path):
+    """URL of the enrollment-checked view serving `path` of a video's assets."""
+    return reverse('get_video_asset', args=[video_id, path])
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single `bytes=` range, end inclusive. Returns None to serve the
+    whole file (no header, or a form this does not handle, e.g. multiple ranges).
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None  # Syntactically invalid, so ignored
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(0, size - int(last)), size - 1  # Suffix range: the last N bytes
+    if start >= size or end < start:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag  # Strong comparison: a weak validator never matches
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def serve(request, name):
+    """Respond with the stored file `name`, honoring conditional and Range headers."""
+    try:
+        path = default_storage.path(name)
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError, SuspiciousFileOperation):
+        # SuspiciousFileOperation: a stored URL that resolves outside MEDIA_ROOT (e.g. '../')
+        raise Http404("Media file not found.")
+    if not S_ISREG(stat.st_mode):
+        raise Http404("Media file not found.")
+
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': f'private, max-age={settings.MEDIA_CACHE_MAX_AGE}',
+    }
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime),
+                                            response=HttpResponse(headers=headers))
+    if not_modified.status_code != 200:
+        return not_modified
+
+    content_type = (CONTENT_TYPES.get(os.path.splitext(name)[1])
+                    or mimetypes.guess_type(name)[0] or 'application/octet-stream')
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + name
+        return response
+
+    size = stat.st_size
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size) \
+            if if_range_matches(request, etag, stat.st_mtime) else None
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416, headers=headers)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['Content-Length'] = size
+        return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type, headers=headers)
+
+    start, end = byte_range
+    file.seek(start)
+    response = FileResponse(FileRange(file, end - start + 1), status=206, content_type=content_type,
+                            headers=headers)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-18 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='seconds_watched',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='total_videos',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='videos_watched',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
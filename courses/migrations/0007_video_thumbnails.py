@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_video_hls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='thumbnails_vtt_url',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-18 08:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_export_watermarks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_position',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_watched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['user', '-last_watched_at'], name='enrollment_resume_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.3 on 2026-10-18 08:33
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+TABLES = ['courses_course', 'courses_video']
+
+
+def create_search_indexes(apps, schema_editor):
+    # Vendor-specific, so not in Meta.indexes; rows are indexed by rebuild_search_index
+    vendor = schema_editor.connection.vendor
+    for table in TABLES:
+        if vendor == 'postgresql':
+            schema_editor.execute(f'CREATE INDEX {table}_search_idx ON {table} USING gin (search_vector)')
+        elif vendor == 'sqlite':
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5("
+                f"id, title, description, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in TABLES:
+        if vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_idx')
+        elif vendor == 'sqlite':
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_enrollment_resume_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
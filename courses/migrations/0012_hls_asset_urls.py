@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def link_hls_through_assets(apps, schema_editor):
+    # MEDIA_URL/hls/<id>/... isn't routed outside DEBUG; point at the enrollment-checked asset view
+    from courses.media import asset_url
+
+    Video = apps.get_model('courses', 'Video')
+    prefix = f"{settings.MEDIA_URL}hls/"
+    for video in Video.objects.filter(hls_master_url__startswith=prefix).iterator():
+        video.hls_master_url = asset_url(video.pk, 'hls/master.m3u8')
+        for rendition in video.hls_renditions:
+            rendition['url'] = asset_url(video.pk, f"hls/{rendition['name']}/index.m3u8")
+        video.save(update_fields=['hls_master_url', 'hls_renditions'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_ingestionjob_uploader'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_hls_through_assets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def unlink_media_thumbnails(apps, schema_editor):
+    # The existing indexes name their sheets by MEDIA_URL, which isn't routed outside DEBUG.
+    # Cleared, so `generate_thumbnails` regenerates them behind the enrollment-checked asset view.
+    Video = apps.get_model('courses', 'Video')
+    Video.objects.filter(thumbnails_vtt_url__startswith=f"{settings.MEDIA_URL}thumbnails/").update(
+        thumbnails_vtt_url=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_hls_asset_urls'),
+    ]
+
+    operations = [
+        migrations.RunPython(unlink_media_thumbnails, migrations.RunPython.noop),
+    ]
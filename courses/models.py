@@ -1,4 +1,5 @@
 import uuid
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -9,6 +10,8 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     poster_url = models.CharField(max_length=500, null=True, blank=True)
+    # Full-text search (see courses.search); GIN-indexed on PostgreSQL, unused on SQLite
+    search_vector = SearchVectorField(null=True, editable=False)
     def __str__(self):
         return self.title
 
@@ -20,9 +23,23 @@ class Enrollment(models.Model):
     completion_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     completion_date = models.DateTimeField(null=True, blank=True)
     last_watched_video = models.UUIDField(null=True, blank=True)
+    # Progress counters maintained by courses.progress from WatchHistory and Video changes
+    videos_watched = models.PositiveIntegerField(default=0)
+    total_videos = models.PositiveIntegerField(default=0)
+    seconds_watched = models.FloatField(default=0)  # Sum of the resume positions of the course's videos
+    # Resume index for the dashboard: position in last_watched_video and when it last moved
+    last_position = models.FloatField(default=0)
+    last_watched_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Also set by the counter UPDATEs in courses.progress
 
     class Meta:
         unique_together = ('user', 'course')
+        indexes = [
+            # Incremental exports: updated_at > watermark
+            models.Index(fields=['updated_at'], name='enrollment_updated_idx'),
+            # Dashboard: a user's enrollments, most recently watched first
+            models.Index(fields=['user', '-last_watched_at'], name='enrollment_resume_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} enrolled in {self.course.title}"
@@ -38,6 +55,25 @@ class Video(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     video_order = models.PositiveIntegerField()
+    # Adaptive-bitrate packaging (see courses.hls)
+    HLS_STATUS_CHOICES = [
+        ('none', 'None'),
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+    hls_status = models.CharField(max_length=20, choices=HLS_STATUS_CHOICES, default='none')
+    hls_master_url = models.CharField(max_length=500, null=True, blank=True)
+    hls_renditions = models.JSONField(default=list, blank=True)  # [{name, height, bandwidth, url}]
+    thumbnails_vtt_url = models.CharField(max_length=500, null=True, blank=True)  # WebVTT index of sprite tiles
+    search_vector = SearchVectorField(null=True, editable=False)  # See Course.search_vector
+
+    class Meta:
+        indexes = [
+            # Course playlists: filter(course=...).order_by('video_order') and the video_order=1 lookup
+            models.Index(fields=['course', 'video_order'], name='video_course_order_idx'),
+        ]
 
 class WatchHistory(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -49,6 +85,76 @@ class WatchHistory(models.Model):
 
     class Meta:
         unique_together = ('user', 'video')
+        indexes = [
+            # Per-course history of a user, newest first
+            models.Index(fields=['user', 'course', '-updated_at'], name='watch_user_course_recent_idx'),
+            # Incremental exports: updated_at > watermark
+            models.Index(fields=['updated_at'], name='watch_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.video.title} - {self.course.title}"
+
+class IngestionJob(models.Model):
+    """Background processing of an uploaded video file (see courses.ingestion)."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    video = models.ForeignKey(Video, related_name='ingestion_jobs', on_delete=models.CASCADE)
+    source = models.CharField(max_length=500)  # Storage name of the uploaded file
+    # Only the uploader and staff can follow the job; NULL for jobs created before this was recorded
+    uploader = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Ingestion of {self.video_id} ({self.status})"
+
+class UploadSession(models.Model):
+    """A resumable upload: chunks are written into one part file (see courses.uploads)."""
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('complete', 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Metadata of the video created when the upload is finalized
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    title = models.CharField(max_length=100)
+    description = models.TextField(null=True, blank=True)
+    video_order = models.PositiveIntegerField()
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    video = models.ForeignKey(Video, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def chunk_length(self, index):
+        return min(self.chunk_size, self.total_size - index * self.chunk_size)
+
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.status})"
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, related_name='chunks', on_delete=models.CASCADE)
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    checksum = models.CharField(max_length=64)  # SHA-256, hex
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('session', 'index')
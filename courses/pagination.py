@@ -0,0 +1,132 @@
+import base64
+import json
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination. Clients that send neither `cursor` nor `page_size`
+    keep getting the plain list; otherwise the response is `{"next", "results"}`
+    and `next` is an opaque token holding the ordering values of the last row.
+    """
+    ordering = ()
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = settings.COURSES_PAGE_SIZE
+        self.max_page_size = settings.COURSES_MAX_PAGE_SIZE
+        self.next_cursor = None
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            page_size = self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, values):
+        payload = json.dumps([str(value) for value in values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def keyset_filter(self, values):
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            equal = {self.ordering[i]: values[i] for i in range(index)}
+            condition |= Q(**equal, **{f"{field}__gt": values[index]})
+        return condition
+
+    def get_ordering_values(self, obj):
+        if isinstance(obj, dict):
+            return [obj[field] for field in self.ordering]  # A values() row
+        values = []
+        for field in self.ordering:
+            value = obj
+            for attr in field.split('__'):
+                value = getattr(value, attr)
+            values.append(value)
+        return values
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            try:
+                queryset = queryset.filter(self.keyset_filter(self.decode_cursor(token)))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+        # Fetch one extra row to find out whether another page exists
+        page = list(queryset[:page_size + 1])
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self.encode_cursor(self.get_ordering_values(page[-1]))
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.next_cursor, 'results': data})
+
+
+class CoursePagination(KeysetPagination):
+    ordering = ('created_at', 'id')
+
+
+class VideoPagination(KeysetPagination):
+    ordering = ('video_order', 'id')
+
+
+class WatchHistoryPagination(KeysetPagination):
+    # Same cursor shape as VideoPagination: (video_order, video id)
+    ordering = ('video__video_order', 'video_id')
+
+
+class SearchPagination(KeysetPagination):
+    """
+    Ranked search results (courses.search.SearchResults). Ranks don't make a keyset,
+    so the cursor holds an offset; pagination is always on, in the same
+    {"next", "results"} shape.
+    """
+    ordering = ('offset',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        offset = 0
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            try:
+                offset = int(self.decode_cursor(token)[0])
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            if offset < 0:
+                raise NotFound(self.invalid_cursor_message)
+
+        page = queryset[offset:offset + page_size + 1]
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self.encode_cursor([offset + page_size])
+        return page
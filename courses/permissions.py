@@ -0,0 +1,93 @@
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from ELearning.replicas import primary
+from . import cache as course_cache
+from .checks import enrollment_cache_enabled
+from .models import Course, Enrollment
+from .utils import validate_uuid
+
+
+def _enrolled_scope(user_id):
+    return f"enrolled:{user_id}"
+
+
+def _enrolled_key(user_id, version):
+    return f"courses:enrolled:{user_id}:v{version}"
+
+
+def _enrolled_query(user_id):
+    return Enrollment.objects.filter(user_id=user_id).values_list('course_id', flat=True)
+
+
+def get_enrolled_course_ids(user_id):
+    """
+    IDs (as strings) of the courses a user is enrolled in, cached until their enrollments change.
+
+    The key embeds a per-user version that invalidate_enrolled_course_ids() bumps once
+    the change commits, and a miss is stored with add(): a set read before the commit
+    lands under the retired version, where nobody reads it.
+    """
+    if not enrollment_cache_enabled():
+        return frozenset(str(course_id) for course_id in _enrolled_query(user_id))
+
+    key = _enrolled_key(user_id, course_cache.get_version(_enrolled_scope(user_id)))
+    course_ids = cache.get(key)
+    if course_ids is None:
+        with primary():  # Cached until the enrollments change, so never from a lagging replica
+            course_ids = frozenset(str(course_id) for course_id in _enrolled_query(user_id))
+        cache.add(key, course_ids, timeout=settings.COURSES_CACHE_TIMEOUT)
+    return course_ids
+
+
+async def aget_enrolled_course_ids(user_id):
+    """get_enrolled_course_ids() for async views."""
+    if not enrollment_cache_enabled():
+        return frozenset([str(course_id) async for course_id in _enrolled_query(user_id)])
+
+    key = _enrolled_key(user_id, await course_cache.aget_version(_enrolled_scope(user_id)))
+    course_ids = await cache.aget(key)
+    if course_ids is None:
+        with primary():
+            course_ids = frozenset([str(course_id) async for course_id in _enrolled_query(user_id)])
+        await cache.aadd(key, course_ids, timeout=settings.COURSES_CACHE_TIMEOUT)
+    return course_ids
+
+
+def invalidate_enrolled_course_ids(user_id, using=None):
+    """Retire the user's cached set once the current transaction commits."""
+    if enrollment_cache_enabled():
+        course_cache.bump_version_on_commit(_enrolled_scope(user_id), using)
+
+
+def is_enrolled(user, course_id):
+    return str(course_id) in get_enrolled_course_ids(user.id)
+
+
+async def ais_enrolled(user, course_id):
+    return str(course_id) in await aget_enrolled_course_ids(user.id)
+
+
+def enrollment_required(view):
+    """
+    Require the user to be enrolled in the view's `course_id`.
+
+    Answers 400 for a malformed ID, 404 for an unknown course and 403 when the user
+    is not enrolled; the view receives `course_id` as a normalized UUID string.
+    Enrolled users are authorized from the cached enrollment set without a query.
+    """
+    @wraps(view)
+    def wrapper(request, course_id, *args, **kwargs):
+        course_uuid = validate_uuid(course_id)
+        if not course_uuid:
+            return Response({"error": "Invalid course ID format."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not is_enrolled(request.user, course_uuid):
+            if not Course.objects.filter(id=course_uuid).exists():
+                return Response({"error": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+
+        return view(request, course_uuid, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,140 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Least
+from django.utils import timezone
+from .models import Enrollment, Video, WatchHistory
+
+
+def _completion_updates(watched_delta=0, total_delta=0):
+    """
+    Update expressions deriving completion_percentage (and completion_date) from the
+    counters. UPDATE reads the old row, so pending counter deltas are added in.
+
+    update() skips auto_now, so every counter UPDATE here sets updated_at itself
+    (incremental exports rely on it).
+    """
+    watched = F('videos_watched') + watched_delta
+    total = F('total_videos') + total_delta
+    percentage = ExpressionWrapper(Least(watched * Value(100.0) / total, Value(100.0)), output_field=FloatField())
+    no_videos = Q(total_videos__lte=-total_delta)
+    complete = Q(videos_watched__gte=F('total_videos') + total_delta - watched_delta) & ~no_videos
+    return {
+        'completion_percentage': Case(
+            When(no_videos, then=Value(0)),
+            default=Cast(percentage, DecimalField(max_digits=5, decimal_places=2)),
+            output_field=DecimalField(max_digits=5, decimal_places=2),
+        ),
+        'completion_date': Case(
+            When(complete & Q(completion_date__isnull=True), then=Value(timezone.now())),
+            When(complete, then=F('completion_date')),
+            default=Value(None),
+        ),
+    }
+
+
+def apply_watch_changes(changes):
+    """
+    Fold watch-history changes into the enrollment counters and resume index.
+
+    `changes` yields (user_id, course_id, video_id, old_time, old_watched, new_time,
+    new_watched) tuples, oldest first; a new row is old_time=0, old_watched=False.
+    Each affected enrollment gets a single UPDATE with the summed deltas, resuming at
+    its last change.
+    """
+    deltas = defaultdict(lambda: [0, 0.0, None, 0.0])
+    for user_id, course_id, video_id, old_time, old_watched, new_time, new_watched in changes:
+        delta = deltas[(user_id, str(course_id))]
+        delta[0] += int(bool(new_watched)) - int(bool(old_watched))
+        delta[1] += float(new_time) - float(old_time)
+        delta[2:] = [video_id, float(new_time)]
+
+    now = timezone.now()
+    for (user_id, course_id), (watched_delta, seconds_delta, video_id, position) in deltas.items():
+        updates = {
+            'seconds_watched': F('seconds_watched') + seconds_delta,
+            'last_watched_video': video_id,
+            'last_position': position,
+            'last_watched_at': now,
+            'updated_at': now,
+        }
+        if watched_delta:
+            updates['videos_watched'] = F('videos_watched') + watched_delta
+            updates.update(_completion_updates(watched_delta=watched_delta))
+        Enrollment.objects.filter(user_id=user_id, course_id=course_id).update(**updates)
+
+
+def save_watch_history(user_id, video, last_watched_time, watched_status):
+    """
+    Store the user's position in `video` (fetched with its course) and move the
+    enrollment counters by the difference. The row is locked from the read of its old
+    values to the counter UPDATE, so concurrent posts (or a heartbeat flush) can't both
+    count one change.
+    """
+    with transaction.atomic():
+        # A new row starts as old_time=0, old_watched=False, like apply_watch_changes() expects
+        WatchHistory.objects.get_or_create(user_id=user_id, video=video, defaults={
+            'course_id': video.course_id, 'last_watched_time': 0, 'watched_status': False,
+        })
+        watch_history = WatchHistory.objects.select_for_update().get(user_id=user_id, video=video)
+        previous = (watch_history.last_watched_time, watch_history.watched_status)
+
+        watch_history.last_watched_time = last_watched_time
+        watch_history.watched_status = watched_status
+        watch_history.course = video.course  # Ensure the course is always correctly set
+        watch_history.save()
+
+        watched = WatchHistory._meta.get_field('watched_status').to_python(watched_status)
+        apply_watch_changes([(user_id, video.course_id, video.id, *previous, last_watched_time, watched)])
+    watch_history.video = video  # For serializers reading the video's title
+    return watch_history
+
+
+def set_resume(user_id, course_id, video_id):
+    """Point an enrollment's resume index at `video_id`, at the user's position in it."""
+    now = timezone.now()
+    position = WatchHistory.objects.filter(user_id=user_id, video_id=video_id).values('last_watched_time')[:1]
+    return Enrollment.objects.filter(user_id=user_id, course_id=course_id).update(
+        last_watched_video=video_id,
+        last_position=Coalesce(Subquery(position), 0.0),
+        last_watched_at=now,
+        updated_at=now,
+    )
+
+
+def video_added(course_id):
+    Enrollment.objects.filter(course_id=course_id).update(
+        total_videos=F('total_videos') + 1,
+        updated_at=timezone.now(),
+        **_completion_updates(total_delta=1),
+    )
+
+
+def rebuild_progress(enrollments=None):
+    """
+    Recompute the counters and resume index of `enrollments` (default: all) from
+    WatchHistory and Video with set-based UPDATEs; returns the number of enrollments
+    rebuilt. An enrollment resumes at its most recent watch-history row, else at its
+    last_watched_video if that video still exists.
+    """
+    if enrollments is None:
+        enrollments = Enrollment.objects.all()
+
+    history = WatchHistory.objects.filter(user=OuterRef('user'), course=OuterRef('course')).values('user')
+    latest = WatchHistory.objects.filter(user=OuterRef('user'), course=OuterRef('course')).order_by('-updated_at', '-id')
+    videos = Video.objects.filter(course=OuterRef('course')).values('course')
+    current = Video.objects.filter(id=OuterRef('last_watched_video'), course=OuterRef('course'))
+    current_position = WatchHistory.objects.filter(user=OuterRef('user'), video=OuterRef('last_watched_video'))
+    rebuilt = enrollments.update(
+        videos_watched=Coalesce(Subquery(history.filter(watched_status=True).annotate(n=Count('id')).values('n')), 0),
+        seconds_watched=Coalesce(Subquery(history.annotate(s=Sum('last_watched_time')).values('s')), 0.0),
+        total_videos=Coalesce(Subquery(videos.annotate(n=Count('id')).values('n')), 0),
+        last_watched_video=Coalesce(Subquery(latest.values('video_id')[:1]), Subquery(current.values('id')[:1])),
+        last_position=Coalesce(Subquery(latest.values('last_watched_time')[:1]),
+                               Subquery(current_position.values('last_watched_time')[:1]), 0.0),
+        last_watched_at=Coalesce(Subquery(latest.values('updated_at')[:1]), F('last_watched_at')),
+        updated_at=timezone.now(),
+    )
+    # Percentages read the counters written above, so they need a second statement
+    enrollments.update(**_completion_updates())
+    return rebuilt
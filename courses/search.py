@@ -0,0 +1,146 @@
+"""
+Full-text search over course and video titles and descriptions.
+
+On PostgreSQL each row keeps a weighted tsvector (title A, description B) in
+`search_vector`, backed by a GIN index and ranked with ts_rank. SQLite has no
+tsvector, so rows are mirrored into an FTS5 table (<table>_fts) and ranked with
+bm25; `search_vector` stays NULL there. The FTS5 table indexes the
+row's id as well, so replacing an entry is an index lookup rather than a scan.
+
+Both indexes are created by migration 0010 and kept current by index()/remove(): the
+model signals call them on save and delete, the catalog import after its bulk
+writes, and the rebuild_search_index command rebuilds everything.
+
+Queries match every term as a word prefix ("djan rest" finds "Django REST
+framework"). Words are not stemmed: stemmers also rewrite prefixes ("deploy" would
+stop matching "deployments"), and prefixes cover most of what stemming adds. Other
+database vendors fall back to unranked icontains filters.
+"""
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections, router
+from django.db.models import F, Q
+
+CONFIG = 'simple'
+MAX_TERMS = 8
+TITLE_WEIGHT, DESCRIPTION_WEIGHT = 10.0, 1.0  # bm25 column weights; ts_rank uses the A/B labels
+
+
+def terms(text):
+    """The search terms of `text`: lower-cased words, at most MAX_TERMS."""
+    return re.findall(r'\w+', (text or '').lower())[:MAX_TERMS]
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def _vector():
+    return (SearchVector('title', weight='A', config=CONFIG)
+            + SearchVector('description', weight='B', config=CONFIG))
+
+
+def index(queryset):
+    """(Re)index the rows of `queryset`, a Course or Video queryset."""
+    model = queryset.model
+    alias = router.db_for_write(model)
+    connection = connections[alias]
+    queryset = queryset.using(alias)
+    if connection.vendor == 'postgresql':
+        queryset.update(search_vector=_vector())
+    elif connection.vendor == 'sqlite':
+        field = model._meta.pk
+        ids = [field.get_db_prep_value(pk, connection) for pk in queryset.values_list('pk', flat=True)]
+        with connection.cursor() as cursor:
+            for chunk in _chunks(ids):
+                _delete_fts(cursor, model, chunk)
+                cursor.execute(
+                    f"INSERT INTO {fts_table(model)} (id, title, description) "
+                    f"SELECT id, title, COALESCE(description, '') FROM {model._meta.db_table} "
+                    f"WHERE id IN ({', '.join(['%s'] * len(chunk))})",
+                    chunk,
+                )
+
+
+def remove(model, pks):
+    """Drop deleted rows from the SQLite index (PostgreSQL's goes with the row)."""
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor != 'sqlite':
+        return
+    field = model._meta.pk
+    with connection.cursor() as cursor:
+        for chunk in _chunks([field.get_db_prep_value(pk, connection) for pk in pks]):
+            _delete_fts(cursor, model, chunk)
+
+
+def _chunks(ids, size=500):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _delete_fts(cursor, model, ids):
+    """Delete the FTS5 entries of `ids` (database values), found through the index of the id column."""
+    table = fts_table(model)
+    match = ' OR '.join(f'"{id}"' for id in ids)
+    cursor.execute(f'DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {table} MATCH %s)',
+                   [f'id : ({match})'])
+
+
+class SearchResults:
+    """
+    The matches of `text` in `queryset`, best first (ties by id). Slicing runs the
+    search for that window only, so SearchPagination can page through it.
+    """
+
+    def __init__(self, queryset, text):
+        self.queryset = queryset
+        self.terms = terms(text)
+        self.connection = connections[router.db_for_read(queryset.model)]
+
+    def _ranked(self):
+        """PostgreSQL: the matching rows annotated with their rank, served by the GIN index."""
+        query = SearchQuery(' & '.join(f'{term}:*' for term in self.terms), search_type='raw', config=CONFIG)
+        return (self.queryset.annotate(rank=SearchRank(F('search_vector'), query))
+                .filter(search_vector=query).order_by('-rank', 'pk'))
+
+    def _fts_sql(self):
+        """SQLite: the FTS5 query for IDs in rank order, and its parameters."""
+        match = ' '.join(f'"{term}"*' for term in self.terms)
+        table = fts_table(self.queryset.model)
+        return (f'SELECT id FROM {table} WHERE {table} MATCH %s '
+                f'ORDER BY bm25({table}, 0, %s, %s), id LIMIT %s OFFSET %s',
+                [f'{{title description}} : ({match})', TITLE_WEIGHT, DESCRIPTION_WEIGHT])
+
+    def __getitem__(self, window):
+        if not isinstance(window, slice):
+            raise TypeError("SearchResults only supports slicing.")
+        start = window.start or 0
+        if not self.terms or window.stop <= start:
+            return []
+
+        if self.connection.vendor == 'postgresql':
+            return list(self._ranked()[start:window.stop])
+        if self.connection.vendor == 'sqlite':
+            sql, params = self._fts_sql()
+            with self.connection.cursor() as cursor:
+                cursor.execute(sql, params + [window.stop - start, start])
+                ids = [row[0] for row in cursor.fetchall()]
+            field = self.queryset.model._meta.pk
+            rows = {row.pk: row for row in self.queryset.filter(pk__in=[field.to_python(pk) for pk in ids])}
+            return [rows[pk] for pk in map(field.to_python, ids) if pk in rows]
+
+        matches = Q()
+        for term in self.terms:
+            matches &= Q(title__icontains=term) | Q(description__icontains=term)
+        return list(self.queryset.filter(matches).order_by('pk')[start:window.stop])
+
+    def explain(self):
+        """The database's plan for the search query."""
+        if self.connection.vendor == 'postgresql':
+            return self._ranked().explain()
+        if self.connection.vendor == 'sqlite' and self.terms:
+            sql, params = self._fts_sql()
+            with self.connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params + [1, 0])
+                return '\n'.join(row[-1] for row in cursor.fetchall())
+        return ''
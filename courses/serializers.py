@@ -1,16 +1,40 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Course, Video, WatchHistory, Enrollment
+from .models import Course, Video, WatchHistory, Enrollment, IngestionJob, UploadSession
 
 class VideoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Video
-        fields = ['id', 'title', 'description', 'video_url', 'poster_url', 'duration', 'created_at', 'updated_at', 'video_order']
+        fields = ['id', 'title', 'description', 'video_url', 'poster_url', 'duration', 'created_at', 'updated_at', 'video_order',
+                  'hls_status', 'hls_master_url', 'hls_renditions', 'thumbnails_vtt_url']
+        read_only_fields = ['hls_status', 'hls_master_url', 'hls_renditions', 'thumbnails_vtt_url']
+
+class VideoUploadSerializer(VideoSerializer):
+    class Meta(VideoSerializer.Meta):
+        fields = VideoSerializer.Meta.fields + ['course']
 
 class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ['id', 'title', 'description', 'created_at', 'updated_at', 'poster_url']
 
+class CourseEnrollmentStatusSerializer(CourseSerializer):
+    # Read from annotations added by the catalog query, not from related rows
+    is_enrolled = serializers.BooleanField(read_only=True)
+    enrollment_status = serializers.CharField(read_only=True, allow_null=True)
+    completion_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True, allow_null=True)
+
+    class Meta(CourseSerializer.Meta):
+        fields = CourseSerializer.Meta.fields + ['is_enrolled', 'enrollment_status', 'completion_percentage']
+
+class VideoSearchResultSerializer(serializers.ModelSerializer):
+    # Search is open to everyone, so no media URLs
+    course_title = serializers.CharField(source='course.title', read_only=True)
+
+    class Meta:
+        model = Video
+        fields = ['id', 'course', 'course_title', 'title', 'description', 'poster_url', 'duration', 'video_order']
+
 class WatchHistorySerializer(serializers.ModelSerializer):
     video_title = serializers.CharField(source='video.title', read_only=True)
     course_title = serializers.CharField(source='course.title', read_only=True)
@@ -22,4 +46,49 @@ class WatchHistorySerializer(serializers.ModelSerializer):
 class EnrollmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Enrollment
-        fields = ['user', 'course', 'status', 'completion_percentage', 'completion_date', 'enrollment_date', 'last_watched_video']
\ No newline at end of file
+        fields = ['user', 'course', 'status', 'completion_percentage', 'completion_date', 'enrollment_date', 'last_watched_video']
+
+class EnrollmentProgressSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Enrollment
+        fields = ['course', 'videos_watched', 'total_videos', 'seconds_watched', 'completion_percentage', 'completion_date']
+
+class ContinueWatchingSerializer(serializers.Serializer):
+    # Reads the values() rows of the dashboard query
+    course = serializers.UUIDField(source='course_id')
+    course_title = serializers.CharField(source='course__title')
+    course_poster_url = serializers.CharField(source='course__poster_url', allow_null=True)
+    video = serializers.UUIDField(source='resume_video', allow_null=True)
+    video_title = serializers.CharField(allow_null=True)
+    video_duration = serializers.DurationField(allow_null=True)
+    position = serializers.FloatField(source='last_position')
+    videos_watched = serializers.IntegerField()
+    total_videos = serializers.IntegerField()
+    completion_percentage = serializers.DecimalField(max_digits=5, decimal_places=2)
+    status = serializers.CharField()
+    last_watched_at = serializers.DateTimeField(allow_null=True)
+
+class IngestionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = IngestionJob
+        fields = ['id', 'video', 'status', 'error', 'created_at', 'updated_at']
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.IntegerField(min_value=1, required=False)
+    total_size = serializers.IntegerField(min_value=1)
+    total_chunks = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'course', 'title', 'description', 'video_order', 'filename', 'total_size', 'chunk_size',
+                  'total_chunks', 'status', 'video', 'created_at']
+        read_only_fields = ['status', 'video']
+
+    def validate_chunk_size(self, value):
+        if value > settings.VIDEO_UPLOAD_MAX_CHUNK_SIZE:
+            raise serializers.ValidationError(f"Chunks can be at most {settings.VIDEO_UPLOAD_MAX_CHUNK_SIZE} bytes.")
+        return value
+
+    def create(self, validated_data):
+        validated_data.setdefault('chunk_size', settings.VIDEO_UPLOAD_CHUNK_SIZE)
+        return super().create(validated_data)
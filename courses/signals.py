@@ -0,0 +1,60 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import cache, progress, search
+from .models import Course, Enrollment, Video
+from .permissions import invalidate_enrolled_course_ids
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_cache(sender, instance, using, **kwargs):
+    cache.bump_version_on_commit(cache.CATALOG, using)
+    cache.bump_version_on_commit(cache.course_scope(instance.pk), using)
+
+
+@receiver([post_save, post_delete], sender=Video)
+def invalidate_video_cache(sender, instance, using, **kwargs):
+    cache.bump_version_on_commit(cache.course_scope(instance.course_id), using)
+    cache.bump_version_on_commit(cache.video_scope(instance.pk), using)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Video)
+def refresh_search_index(sender, instance, **kwargs):
+    search.index(sender.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Video)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove(sender, [instance.pk])
+
+
+@receiver(post_save, sender=Video)
+def count_added_video(sender, instance, created, **kwargs):
+    if created:
+        progress.video_added(instance.course_id)
+
+
+@receiver(post_delete, sender=Video)
+def recount_removed_video(sender, instance, **kwargs):
+    # The video's watch rows are gone with it, so recount the course from scratch
+    progress.rebuild_progress(Enrollment.objects.filter(course_id=instance.course_id))
+
+
+@receiver(post_save, sender=Enrollment)
+def invalidate_enrolled_courses_on_enroll(sender, instance, created, using, **kwargs):
+    # Status/progress updates don't change which courses the user is enrolled in
+    if created:
+        invalidate_enrolled_course_ids(instance.user_id, using)
+
+
+@receiver(post_save, sender=Enrollment)
+def initialize_progress(sender, instance, created, **kwargs):
+    # Counts the course's videos, and any watch history left from an earlier enrollment
+    if created:
+        progress.rebuild_progress(Enrollment.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Enrollment)
+def invalidate_enrolled_courses_on_unenroll(sender, instance, using, **kwargs):
+    invalidate_enrolled_course_ids(instance.user_id, using)
@@ -0,0 +1,142 @@
+"""
+Scrub previews and posters.
+
+ffmpeg decodes one frame every VIDEO_THUMBNAIL_INTERVAL seconds, already scaled to
+poster size. Frames are handled with numpy a sprite-sheet row at a time: the row is
+stacked into one array, its frame variances computed at once (the busiest frame
+becomes the poster candidate), and it is shrunk to thumbnails with a single block
+average. Rows are packed into sprite sheets of VIDEO_SPRITE_COLUMNS x
+VIDEO_SPRITE_ROWS tiles, indexed by a WebVTT file of `#xywh=` cues that players use
+for scrub previews. The index and its sheets are served by the enrollment-checked
+asset view (see courses.media); cues name the sheets relatively, so they do too.
+"""
+import io
+import posixpath
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from . import media
+
+POSTER_SCALE = 4  # Frames are decoded at POSTER_SCALE x the thumbnail width
+
+
+def _timestamp(seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}"
+
+
+def _save_jpeg(name, pixels):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=85)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def sample_frames(path, interval, width):
+    """
+    Yield (width, height) once, then one RGB frame (bytes) per `interval` seconds,
+    scaled by ffmpeg to `width` and a height divisible by POSTER_SCALE.
+    """
+    import imageio_ffmpeg
+
+    scale = f"scale={width}:trunc(ow/a/{2 * POSTER_SCALE})*{2 * POSTER_SCALE}"
+    frames = imageio_ffmpeg.read_frames(path, output_params=['-vf', f"fps=1/{interval},{scale}"])
+    try:
+        yield tuple(next(frames)['size'])
+        yield from frames
+    finally:
+        frames.close()
+
+
+def shrink(frames, factor):
+    """Downscale a (n, h, w, 3) uint8 stack by an integer factor, averaging factor x factor blocks."""
+    count, height, width, channels = frames.shape
+    blocks = frames.reshape(count, height // factor, factor, width // factor, factor, channels)
+    return blocks.mean(axis=(2, 4)).round().astype('uint8')
+
+
+def pack_sheet(thumbnails, columns):
+    """Lay a (n, h, w, 3) stack out as a sheet `columns` tiles wide (missing tiles black)."""
+    import numpy as np
+
+    count, height, width, channels = thumbnails.shape
+    rows = -(-count // columns)
+    padded = np.zeros((rows * columns, height, width, channels), dtype=thumbnails.dtype)
+    padded[:count] = thumbnails
+    return padded.reshape(rows, columns, height, width, channels).swapaxes(1, 2).reshape(
+        rows * height, columns * width, channels)
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(video, source):
+    """
+    Write sprite sheets and a WebVTT index for the stored file `source`, and a poster
+    unless `video` already has one; records the URLs on the video.
+    """
+    import numpy as np
+
+    interval = settings.VIDEO_THUMBNAIL_INTERVAL
+    columns, per_sheet = settings.VIDEO_SPRITE_COLUMNS, settings.VIDEO_SPRITE_COLUMNS * settings.VIDEO_SPRITE_ROWS
+    directory = f"thumbnails/{video.pk}"
+
+    frames = sample_frames(default_storage.path(source), interval, settings.VIDEO_THUMBNAIL_WIDTH * POSTER_SCALE)
+    width, height = next(frames)
+    # Full-size frames are only held a row at a time; the thumbnails are small enough to keep
+    thumbnails, poster, poster_variance = [], None, -1.0
+    for batch in _batches(frames, columns):
+        stack = np.frombuffer(b''.join(batch), dtype=np.uint8).reshape(len(batch), height, width, 3)
+        variances = stack.reshape(len(batch), -1).var(axis=1)
+        best = int(variances.argmax())
+        if variances[best] > poster_variance:  # Flat (black, faded) frames make poor posters
+            poster, poster_variance = stack[best].copy(), float(variances[best])
+        thumbnails.append(shrink(stack, POSTER_SCALE))
+    if not thumbnails:
+        raise ValueError("No frames could be decoded.")
+    thumbnails = np.concatenate(thumbnails)
+    count, thumb_height, thumb_width, _ = thumbnails.shape
+
+    # Relative to the index, which sits in the same directory
+    sheet_urls = [
+        posixpath.basename(_save_jpeg(f"{directory}/sheet_{sheet:03d}.jpg",
+                                      pack_sheet(thumbnails[start:start + per_sheet], columns)))
+        for sheet, start in enumerate(range(0, count, per_sheet))
+    ]
+    duration = video.duration.total_seconds() if video.duration else count * interval
+    lines = ['WEBVTT', '']
+    for index in range(count):
+        sheet, tile = divmod(index, per_sheet)
+        row, column = divmod(tile, columns)
+        start = index * interval
+        end = max(min(start + interval, duration), start + 0.001)
+        lines += [
+            f"{_timestamp(start)} --> {_timestamp(end)}",
+            f"{sheet_urls[sheet]}#xywh={column * thumb_width},{row * thumb_height},{thumb_width},{thumb_height}",
+            '',
+        ]
+    vtt_name = f"{directory}/thumbnails.vtt"
+    if default_storage.exists(vtt_name):
+        default_storage.delete(vtt_name)
+    vtt_name = default_storage.save(vtt_name, ContentFile('\n'.join(lines).encode()))
+
+    video.thumbnails_vtt_url = media.asset_url(video.pk, f"thumbnails/{posixpath.basename(vtt_name)}")
+    updated_fields = ['thumbnails_vtt_url']
+    if not video.poster_url:
+        video.poster_url = default_storage.url(_save_jpeg(f"posters/{video.pk}.jpg", poster))
+        updated_fields.append('poster_url')
+    # save() so the cached video payloads pick up the new fields
+    video.save(update_fields=updated_fields + ['updated_at'])
+    return video
@@ -0,0 +1,104 @@
+"""
+Resumable uploads.
+
+A session preallocates one part file of the announced size; every chunk is written
+straight to its offset in it (index * chunk_size), so chunks may arrive in any order,
+in parallel, or again after a failure. Finalizing renames the part file into the
+video directory instead of copying it.
+"""
+import hashlib
+import io
+import os
+import uuid
+from django.core.files.storage import default_storage
+from .models import UploadChunk
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class ChunkError(ValueError):
+    pass
+
+
+def part_name(session):
+    return f"uploads/{session.pk}.part"
+
+
+def create_part_file(session):
+    path = default_storage.path(part_name(session))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as part:
+        part.truncate(session.total_size)  # Sparse on most filesystems
+
+
+def write_chunk(session, index, stream, checksum, content_length=None):
+    """
+    Copy chunk `index` from `stream` into the part file, READ_BLOCK_SIZE bytes at a
+    time, and record it once its length and SHA-256 `checksum` (hex) check out.
+    """
+    if not 0 <= index < session.total_chunks:
+        raise ChunkError(f"Chunk index must be between 0 and {session.total_chunks - 1}.")
+    if not checksum:
+        raise ChunkError("The X-Chunk-Checksum header (hex SHA-256 of the chunk) is required.")
+    expected = session.chunk_length(index)
+    if content_length is not None and content_length != expected:
+        raise ChunkError(f"Chunk {index} must be {expected} bytes.")
+    stream = stream or io.BytesIO()
+
+    digest = hashlib.sha256()
+    written = 0
+    with open(default_storage.path(part_name(session)), 'r+b') as part:
+        part.seek(index * session.chunk_size)
+        # Read one byte past the expected length to notice oversized bodies
+        while written <= expected:
+            block = stream.read(min(READ_BLOCK_SIZE, expected + 1 - written))
+            if not block:
+                break
+            written += len(block)
+            if written <= expected:
+                digest.update(block)
+                part.write(block)
+        part.flush()
+        os.fsync(part.fileno())
+
+    if written != expected:
+        raise ChunkError(f"Chunk {index} must be {expected} bytes.")
+    if digest.hexdigest() != checksum.lower():
+        raise ChunkError(f"Checksum mismatch for chunk {index}.")
+    UploadChunk.objects.update_or_create(session=session, index=index,
+                                         defaults={'size': written, 'checksum': digest.hexdigest()})
+    return written
+
+
+def received_ranges(session):
+    """Byte ranges received so far as [start, end) pairs, adjacent chunks merged."""
+    ranges = []
+    for index, size in session.chunks.order_by('index').values_list('index', 'size'):
+        start = index * session.chunk_size
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = start + size
+        else:
+            ranges.append([start, start + size])
+    return ranges
+
+
+def missing_chunks(session):
+    received = set(session.chunks.values_list('index', flat=True))
+    return [index for index in range(session.total_chunks) if index not in received]
+
+
+def assemble(session):
+    """Move the completed part file into the video directory; returns its storage name."""
+    extension = os.path.splitext(session.filename)[1].lower()
+    name = f"videos/{uuid.uuid4()}{extension}"
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(default_storage.path(part_name(session)), path)
+    return name
+
+
+def discard(session):
+    try:
+        os.remove(default_storage.path(part_name(session)))
+    except FileNotFoundError:
+        pass
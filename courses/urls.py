@@ -1,20 +1,44 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('routes/', views.getRoutes, name='courses_get_routes'),
     path('all-courses/', views.list_courses, name='list_courses'),
     path('all-courses-with-status/', views.list_courses_with_enrollment_status, name='list_courses_with_enrollment_status'),
-    path('course-list/', views.enrolled_list_courses, name='list_courses'),
+    path('course-list/', views.enrolled_list_courses, name='enrolled_list_courses'),
+    path('search/courses/', views.search_courses, name='search_courses'),
+    path('search/videos/', views.search_videos, name='search_videos'),
     path('course-videos/<uuid:course_id>/', views.get_course_videos, name='get_course_videos'),
     path('course-details/<uuid:course_id>/', views.get_course_details, name='get_course_details'),
     path('course/<uuid:course_id>/last-watched/', views.get_last_watched, name='get_last_watched'),
     path('course/<uuid:course_id>/last-watched/update/', views.update_last_watched,name='update_last_watched'),
+    path('course/<uuid:course_id>/progress/', views.get_course_progress, name='get_course_progress'),
+    path('course/<uuid:course_id>/online/', views.get_course_online_users, name='get_course_online_users'),
+    path('dashboard/', views.get_dashboard, name='get_dashboard'),
     path('course-content/<uuid:course_id>/watch-history/', views.get_course_watch_history, name='get_course_watch_history'),
     path('videos/<uuid:video_id>/', views.get_video, name='get_video'),
     path('videos/<uuid:video_id>/watch-history/', views.get_video_watch_history, name='get_video_watch_history'),
+    path('videos/<uuid:video_id>/stream/', views.stream_video, name='stream_video'),
+    path('videos/<uuid:video_id>/poster/', views.get_video_poster, name='get_video_poster'),
+    path('videos/<uuid:video_id>/assets/<path:path>', views.get_video_asset, name='get_video_asset'),
     path('videos/<uuid:video_id>/watch-history/update/', views.update_watch_history, name='update_watch_history'),
+    path('videos/watch-history/batch/', views.update_watch_history_batch, name='update_watch_history_batch'),
     path('videos/upload/', views.upload_video, name='upload_video'),
+    path('videos/ingestion/<uuid:job_id>/', views.get_ingestion_job, name='get_ingestion_job'),
+    path('videos/uploads/', views.create_upload_session, name='create_upload_session'),
+    path('videos/uploads/<uuid:session_id>/', views.get_upload_session, name='get_upload_session'),
+    path('videos/uploads/<uuid:session_id>/chunks/<int:index>/', views.upload_chunk, name='upload_chunk'),
+    path('videos/uploads/<uuid:session_id>/finalize/', views.finalize_upload_session, name='finalize_upload_session'),
     path('enroll/', views.enroll_in_course, name='enroll_in_course'),
     path('enrollment/update/', views.update_enrollment_status, name='update_enrollment_status'),
+    path('cache/stats/', views.get_cache_stats, name='get_cache_stats'),
+    path('export/<str:dataset>/', views.export_data, name='export_data'),
+    # Async variants of the polling and heartbeat endpoints, for ASGI deployments
+    path('async/course/<uuid:course_id>/last-watched/', async_views.get_last_watched, name='async_get_last_watched'),
+    path('async/videos/<uuid:video_id>/watch-history/', async_views.get_video_watch_history,
+         name='async_get_video_watch_history'),
+    path('async/videos/<uuid:video_id>/watch-history/update/', async_views.update_watch_history,
+         name='async_update_watch_history'),
+    path('async/videos/watch-history/batch/', async_views.update_watch_history_batch,
+         name='async_update_watch_history_batch'),
 ]
@@ -0,0 +1,8 @@
+from uuid import UUID
+
+def validate_uuid(uuid_str):
+    try:
+        # Convert input to UUID object to validate, then back to string to maintain consistency
+        return str(UUID(str(uuid_str)))
+    except (ValueError, TypeError):
+        return None
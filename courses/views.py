@@ -1,37 +1,212 @@
+import os
+import uuid
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, parser_classes
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from .models import Course, Video, WatchHistory, Enrollment
-from .serializers import CourseSerializer, WatchHistorySerializer, VideoSerializer
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
+from django.urls import reverse
+from authentication.authentication import QueryParamJWTAuthentication
+from authentication.presence import presence
+from . import cache, conditional, exports, fast_json, ingestion, media, search, uploads
+from .heartbeats import read_batch, sort_batch, watch_history_buffer
+from .models import Course, Video, WatchHistory, Enrollment, IngestionJob, UploadSession
+from .progress import save_watch_history, set_resume
+from .permissions import enrollment_required, get_enrolled_course_ids, is_enrolled
+from .pagination import CoursePagination, SearchPagination, VideoPagination, WatchHistoryPagination
+from .serializers import (
+    ContinueWatchingSerializer, CourseSerializer, CourseEnrollmentStatusSerializer, EnrollmentProgressSerializer,
+    IngestionJobSerializer,
+    UploadSessionSerializer, WatchHistorySerializer, VideoSearchResultSerializer, VideoSerializer, VideoUploadSerializer,
+)
+from .utils import validate_uuid
+from django.db.models import DurationField, Exists, F, OuterRef, Subquery, UUIDField
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from uuid import UUID
 
-def validate_uuid(uuid_str):
-    try:
-        # Convert input to UUID object to validate, then back to string to maintain consistency
-        return str(UUID(str(uuid_str)))
-    except (ValueError, TypeError):
-        return None
+def get_course_payload(course_id):
+    """Serialized course details, read through the course cache."""
+    def build():
+        return CourseSerializer(Course.objects.get(id=course_id)).data
+    return cache.get_or_set(cache.course_scope(course_id), 'details', build)
+
+def get_video_payload(video_id):
+    """Serialized video plus its course ID (for the enrollment check), read through the video cache."""
+    def build():
+        video = Video.objects.get(id=video_id)
+        return {'course': str(video.course_id), 'data': VideoSerializer(video).data}
+    return cache.get_or_set(cache.video_scope(video_id), 'details', build)
+
+def get_video_validators(video_id):
+    """ETag/Last-Modified of a video plus its course ID, or None if it doesn't exist; read through the video cache."""
+    def build():
+        row = Video.objects.filter(id=video_id).values('course_id', 'updated_at').first()
+        if row is None:
+            return None
+        return {'course': str(row['course_id']), **conditional.make_validators(row['updated_at'], 1)}
+    return cache.get_or_set(cache.video_scope(video_id), 'validators', build)
 
 @api_view(['POST'])
+@permission_classes([IsAdminUser])
 @parser_classes([MultiPartParser, FormParser])
 def upload_video(request):
-    """Handles uploading a video."""
-    serializer = VideoSerializer(data=request.data)
-    if serializer.is_valid():
+    """
+    Handles uploading a video. With a `file` part, the file is stored and a background
+    ingestion job fills in the duration and poster; the response carries the job.
+    """
+    # Spool every upload to a temporary file in chunks instead of buffering small ones in memory
+    request.upload_handlers = [TemporaryFileUploadHandler(request._request)]
+    serializer = VideoUploadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    upload = request.FILES.get('file')
+    if upload is None:
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    # Moved (not copied) into storage when the temporary file is on the same filesystem
+    extension = os.path.splitext(upload.name)[1].lower()
+    source = default_storage.save(f"videos/{uuid.uuid4()}{extension}", upload)
+    try:
+        with transaction.atomic():
+            video = serializer.save(video_url=default_storage.url(source))
+            job = ingestion.create_job(video, source, request.user.id)
+    except Exception:
+        default_storage.delete(source)
+        raise
+    return ingestion_response(job, serializer.data)
+
+
+def ingestion_response(job, video_data):
+    return Response({
+        "job": IngestionJobSerializer(job).data,
+        "status_url": reverse('get_ingestion_job', args=[job.id]),
+        "video": video_data,
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_ingestion_job(request, job_id):
+    """Status of a video ingestion job, for its uploader and staff."""
+    job = IngestionJob.objects.filter(id=job_id).first()
+    if job is None or (job.uploader_id != request.user.id and not request.user.is_staff):
+        return Response({"error": "Ingestion job not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(IngestionJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+def get_upload_session_or_none(request, session_id):
+    # Sessions are private to the user who opened them
+    return UploadSession.objects.filter(id=session_id, user_id=request.user.id).first()
+
+
+def upload_session_payload(session):
+    return {
+        **UploadSessionSerializer(session).data,
+        "received": uploads.received_ranges(session),
+        "missing_chunks": uploads.missing_chunks(session),
+    }
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def create_upload_session(request):
+    """
+    Start a resumable upload; the video metadata is given now, the file in chunks.
+    Like the other video writes, uploads are for staff.
+    """
+    serializer = UploadSessionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    session = serializer.save(user_id=request.user.id)
+    uploads.create_part_file(session)
+    return Response(upload_session_payload(session), status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_upload_session(request, session_id):
+    """Session state with the byte ranges received so far, for resuming."""
+    session = get_upload_session_or_none(request, session_id)
+    if not session:
+        return Response({"error": "Upload session not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(upload_session_payload(session), status=status.HTTP_200_OK)
+
+
+@api_view(['PUT'])
+@permission_classes([IsAdminUser])
+def upload_chunk(request, session_id, index):
+    """
+    Store chunk `index` (the raw request body) of an upload. X-Chunk-Checksum carries
+    its hex SHA-256; a chunk can be sent again until the upload is finalized.
+    """
+    session = get_upload_session_or_none(request, session_id)
+    if not session:
+        return Response({"error": "Upload session not found."}, status=status.HTTP_404_NOT_FOUND)
+    if session.status != 'open':
+        return Response({"error": "Upload session is already finalized."}, status=status.HTTP_409_CONFLICT)
+
+    content_length = request.META.get('CONTENT_LENGTH')
+    try:
+        size = uploads.write_chunk(
+            session, index, request.stream, request.headers.get('X-Chunk-Checksum'),
+            content_length=int(content_length) if content_length else None,
+        )
+    except uploads.ChunkError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"index": index, "size": size}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def finalize_upload_session(request, session_id):
+    """Turn a fully received upload into a video and queue its ingestion."""
+    with transaction.atomic():
+        # Locked, so concurrent finalize requests can't both move the part file
+        session = UploadSession.objects.select_for_update().filter(id=session_id, user_id=request.user.id).first()
+        if not session:
+            return Response({"error": "Upload session not found."}, status=status.HTTP_404_NOT_FOUND)
+        if session.status != 'open':
+            return Response({"error": "Upload session is already finalized."}, status=status.HTTP_409_CONFLICT)
+        missing = uploads.missing_chunks(session)
+        if missing:
+            return Response({"error": "Upload is incomplete.", "missing_chunks": missing},
+                            status=status.HTTP_409_CONFLICT)
+
+        source = uploads.assemble(session)
+        video = Video.objects.create(
+            course_id=session.course_id,
+            title=session.title,
+            description=session.description,
+            video_order=session.video_order,
+            video_url=default_storage.url(source),
+        )
+        job = ingestion.create_job(video, source, request.user.id)
+        session.status = 'complete'
+        session.video = video
+        session.save(update_fields=['status', 'video', 'updated_at'])
+    return ingestion_response(job, VideoUploadSerializer(video).data)
 
 
 @api_view(['GET'])
 def list_courses(request):
     """Lists all available courses."""
-    courses = Course.objects.all()
-    serializer = CourseSerializer(courses, many=True)
-    return Response(serializer.data)
+    def build():
+        return fast_json.list_data(Course.objects.all(), CourseSerializer, CoursePagination(), request)
+
+    page_key = cache.request_key(request, 'cursor', 'page_size')
+    validators = conditional.get_validators(cache.CATALOG, 'list', Course.objects.all(), page_key)
+    response = conditional.not_modified(request, validators)
+    if response is not None:
+        return response
+    return conditional.set_validators(Response(cache.get_or_set(cache.CATALOG, f"list:{page_key}", build)), validators)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -39,50 +214,55 @@ def enrolled_list_courses(request):
     """Lists courses the user is enrolled in."""
     user = request.user
     # Filter courses by user enrollment
-    enrolled_courses = Enrollment.objects.filter(user=user).values_list('course', flat=True)
-    courses = Course.objects.filter(id__in=enrolled_courses)
-    serializer = CourseSerializer(courses, many=True)
-    return Response(serializer.data)
+    courses = Course.objects.filter(id__in=get_enrolled_course_ids(user.id))
+    return Response(fast_json.list_data(courses, CourseSerializer, CoursePagination(), request))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_courses_with_enrollment_status(request):
     """Lists all courses with enrollment status for the logged-in user."""
     user = request.user
-    # Get all courses
-    courses = Course.objects.all()
-    # Get courses the user is enrolled in
-    enrolled_course_ids = Enrollment.objects.filter(user=user).values_list('course_id', flat=True)
-    # Serialize courses and add enrollment status
-    serialized_courses = []
-    for course in courses:
-        serialized_course = CourseSerializer(course).data
-        serialized_course['is_enrolled'] = course.id in enrolled_course_ids  # Add enrollment status
-        serialized_courses.append(serialized_course)
-
-    return Response(serialized_courses, status=status.HTTP_200_OK)
+    # Annotate every course with the user's enrollment in the same query
+    enrollments = Enrollment.objects.filter(user_id=user.id, course=OuterRef('pk'))
+    courses = Course.objects.annotate(
+        is_enrolled=Exists(enrollments),
+        enrollment_status=Subquery(enrollments.values('status')[:1]),
+        completion_percentage=Subquery(enrollments.values('completion_percentage')[:1]),
+    )
+    serializer = CourseEnrollmentStatusSerializer(courses, many=True)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+def search_response(request, queryset, serializer_class):
+    """Page through the full-text matches of ?q= in `queryset`, best first."""
+    results = search.SearchResults(queryset, request.query_params.get('q'))
+    if not results.terms:
+        return Response({"error": "Search query is required."}, status=status.HTTP_400_BAD_REQUEST)
+    paginator = SearchPagination()
+    page = paginator.paginate_queryset(results, request)
+    return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
+@api_view(['GET'])
+def search_courses(request):
+    """Full-text search over course titles and descriptions."""
+    return search_response(request, Course.objects.all(), CourseSerializer)
+
+@api_view(['GET'])
+def search_videos(request):
+    """Full-text search over video titles and descriptions."""
+    return search_response(request, Video.objects.select_related('course'), VideoSearchResultSerializer)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@enrollment_required
 def get_course_details(request, course_id):
     """Retrieve details for a specific course."""
-    course_uuid = validate_uuid(course_id)
-    if not course_uuid:
-        return Response({"error": "Invalid course ID format."}, status=status.HTTP_400_BAD_REQUEST)
-
+    validators = conditional.get_validators(cache.course_scope(course_id), 'details', Course.objects.filter(id=course_id))
+    response = conditional.not_modified(request, validators)
+    if response is not None:
+        return response
     try:
-        # Fetch the course using the validated UUID
-        course = Course.objects.get(id=course_uuid)
-
-        # Check if the user is enrolled in this course
-        user = request.user
-        if not Enrollment.objects.filter(user=user, course=course).exists():
-            return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
-
-        # Serialize the course details
-        serializer = CourseSerializer(course)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
+        # Fetch the serialized course (cached until the course changes)
+        return conditional.set_validators(Response(get_course_payload(course_id), status=status.HTTP_200_OK), validators)
     except Course.DoesNotExist:
         return Response({"error": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -94,89 +274,123 @@ def get_last_watched(request, course_id):
     if not course_uuid:
         return Response({"error": "Invalid course ID format."}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        # Fetch the course using the validated UUID
-        course = Course.objects.get(id=course_uuid)
+    # The enrollment lookup doubles as the enrollment check
+    user = request.user
+    enrollment = Enrollment.objects.filter(user_id=user.id, course_id=course_uuid).first()
+    if not enrollment:
+        if not Course.objects.filter(id=course_uuid).exists():
+            return Response({"error": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+
+    # Get the last_watched_video from the enrollment
+    last_watched_video = enrollment.last_watched_video
+
+    if not last_watched_video:
+        # If no video has been watched, fetch the video with video_order = 1
+        first_video = Video.objects.filter(course_id=course_uuid, video_order=1).first()
+        if first_video:
+            # Return the video with video_order = 1
+            return Response({"last_watched_video": first_video.id}, status=status.HTTP_200_OK)
+        else:
+            return Response({"error": "No videos available in this course."}, status=status.HTTP_404_NOT_FOUND)
+
+    # Return the last watched video ID
+    return Response({"last_watched_video": last_watched_video}, status=status.HTTP_200_OK)
 
-        # Check if the user is enrolled in this course
-        user = request.user
-        enrollment = Enrollment.objects.filter(user=user, course=course).first()
-        if not enrollment:
-            return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def update_last_watched(request, course_id):
+    """Update the last-watched video ID for an enrollment."""
+    course_uuid = validate_uuid(course_id)
+    if not course_uuid:
+        return Response({"error": "Invalid course ID format."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Get the last_watched_video from the enrollment
-        last_watched_video = enrollment.last_watched_video
+    # The enrollment lookup doubles as the enrollment check
+    user = request.user
+    enrollment = Enrollment.objects.filter(user_id=user.id, course_id=course_uuid).first()
+    if not enrollment:
+        if not Course.objects.filter(id=course_uuid).exists():
+            return Response({"error": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+
+    # Get the last_watched video ID from request data
+    last_watched = request.data.get('last_watched')
+    if not validate_uuid(last_watched):  # Validate the video ID
+        return Response({"error": "Invalid video ID format."}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not last_watched_video:
-            # If no video has been watched, fetch the video with video_order = 1
-            first_video = course.videos.filter(video_order=1).first()
-            if first_video:
-                # Return the video with video_order = 1
-                return Response({"last_watched_video": first_video.id}, status=status.HTTP_200_OK)
-            else:
-                return Response({"error": "No videos available in this course."}, status=status.HTTP_404_NOT_FOUND)
+    # Move the enrollment's resume index to that video, at the user's saved position in it
+    set_resume(user.id, course_uuid, last_watched)
 
-        # Return the last watched video ID
-        return Response({"last_watched_video": last_watched_video}, status=status.HTTP_200_OK)
+    return Response({"message": "Last watched video updated successfully."}, status=status.HTTP_200_OK)
 
-    except Course.DoesNotExist:
-        return Response({"error": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
 
-@api_view(['POST'])
+@api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def update_last_watched(request, course_id):
-    """Update the last-watched video ID for an enrollment."""
+def get_course_progress(request, course_id):
+    """Retrieve the server-maintained progress counters for an enrollment."""
     course_uuid = validate_uuid(course_id)
     if not course_uuid:
         return Response({"error": "Invalid course ID format."}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        # Fetch the course using the validated UUID
-        course = Course.objects.get(id=course_uuid)
+    enrollment = Enrollment.objects.filter(user_id=request.user.id, course_id=course_uuid).first()
+    if not enrollment:
+        if not Course.objects.filter(id=course_uuid).exists():
+            return Response({"error": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
 
-        # Check if the user is enrolled in this course
-        user = request.user
-        enrollment = Enrollment.objects.filter(user=user, course=course).first()
-        if not enrollment:
-            return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+    return Response(EnrollmentProgressSerializer(enrollment).data, status=status.HTTP_200_OK)
 
-        # Get the last_watched video ID from request data
-        last_watched = request.data.get('last_watched')
-        if not validate_uuid(last_watched):  # Validate the video ID
-            return Response({"error": "Invalid video ID format."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Update the enrollment's last_watched_video field
-        enrollment.last_watched_video = last_watched
-        enrollment.save()
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_dashboard(request):
+    """List the user's enrollments as continue-watching entries, most recently watched first."""
+    # One query: the resume index lives on the enrollment, the video columns come from subqueries
+    first_video = Video.objects.filter(course=OuterRef('course'), video_order=1).values('id')[:1]
+    resume_video = Video.objects.filter(course=OuterRef('course'), id=OuterRef('resume_video'))
+    entries = (
+        Enrollment.objects.filter(user_id=request.user.id)
+        .annotate(
+            resume_video=Coalesce('last_watched_video', Subquery(first_video), output_field=UUIDField()),
+            video_title=Subquery(resume_video.values('title')[:1]),
+            video_duration=Subquery(resume_video.values('duration')[:1], output_field=DurationField()),
+        )
+        .order_by(F('last_watched_at').desc(nulls_last=True), '-enrollment_date')
+        .values(
+            'course_id', 'course__title', 'course__poster_url', 'resume_video', 'video_title', 'video_duration',
+            'last_position', 'videos_watched', 'total_videos', 'completion_percentage', 'status', 'last_watched_at',
+        )
+    )
+    return Response(ContinueWatchingSerializer(entries, many=True).data, status=status.HTTP_200_OK)
 
-        return Response({"message": "Last watched video updated successfully."}, status=status.HTTP_200_OK)
 
-    except Course.DoesNotExist:
-        return Response({"error": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@enrollment_required
+def get_course_online_users(request, course_id):
+    """List the enrolled users of a course that are currently online."""
+    # One query for the roster, one cache round trip for everyone's presence
+    students = dict(Enrollment.objects.filter(course_id=course_id).values_list('user_id', 'user__username'))
+    online = presence.online_among(students)
+    users = [{"id": user_id, "username": students[user_id]} for user_id in sorted(online)]
+    return Response({"count": len(users), "users": users}, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@enrollment_required
 def get_course_videos(request, course_id):
     """Retrieve videos for a specific course."""
-    # Validate the course UUID
-    course_uuid = validate_uuid(course_id)
-    if not course_uuid:
-        return Response({"error": "Invalid course ID format."}, status=status.HTTP_400_BAD_REQUEST)
-
-    try:
-        course = Course.objects.get(id=course_uuid)
-        # Check if the user is enrolled in this course
-        user = request.user
-        if not Enrollment.objects.filter(user=user, course=course).exists():
-            return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+    def build():
+        videos = Video.objects.filter(course_id=course_id).order_by('video_order')  # Order by video order
+        return fast_json.list_data(videos, VideoSerializer, VideoPagination(), request)
 
-        videos = Video.objects.filter(course=course).order_by('video_order')  # Order by video order
-        video_serializer = VideoSerializer(videos, many=True)
-        return Response(video_serializer.data)
-
-    except Course.DoesNotExist:
-        return Response({"error": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+    scope, page_key = cache.course_scope(course_id), cache.request_key(request, 'cursor', 'page_size')
+    validators = conditional.get_validators(scope, 'videos', Video.objects.filter(course_id=course_id), page_key)
+    response = conditional.not_modified(request, validators)
+    if response is not None:
+        return response
+    return conditional.set_validators(Response(cache.get_or_set(scope, f"videos:{page_key}", build)), validators)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -187,66 +401,135 @@ def get_video(request, video_id):
     if not video_uuid:
         return Response({"error": "Invalid video ID format."}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        # Retrieve the video by ID
-        video = Video.objects.get(id=video_uuid)
-        user = request.user
+    validators = get_video_validators(video_uuid)
+    if validators is None:
+        return Response({"error": "Video not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        # Check if the user is enrolled in the course related to the video
-        if not Enrollment.objects.filter(user=user, course=video.course).exists():
-            return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+    # Check if the user is enrolled in the course related to the video
+    if not is_enrolled(request.user, validators['course']):
+        return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+
+    response = conditional.not_modified(request, validators)
+    if response is not None:
+        return response
+    try:
+        # Retrieve the serialized video (cached until the video changes)
+        video = get_video_payload(video_uuid)
+    except Video.DoesNotExist:
+        return Response({"error": "Video not found."}, status=status.HTTP_404_NOT_FOUND)
+    return conditional.set_validators(Response(video['data'], status=status.HTTP_200_OK), validators)
 
-        # Serialize the video details
-        serializer = VideoSerializer(video)
-        return Response(serializer.data, status=status.HTTP_200_OK)
 
+def get_enrolled_video_payload(request, video_id):
+    """The cached payload of a video whose course the user is enrolled in, or the error Response."""
+    video_uuid = validate_uuid(video_id)
+    if not video_uuid:
+        return Response({"error": "Invalid video ID format."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        video = get_video_payload(video_uuid)
     except Video.DoesNotExist:
         return Response({"error": "Video not found."}, status=status.HTTP_404_NOT_FOUND)
+    if not is_enrolled(request.user, video['course']):
+        return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+    return video
+
+
+def serve_media(request, name):
+    try:
+        return media.serve(request, name)
+    except Http404:
+        return Response({"error": "Media file not found."}, status=status.HTTP_404_NOT_FOUND)
+
+
+def serve_video_media(request, video_id, field):
+    """Serve the local file behind a video's `field` URL to users enrolled in its course."""
+    video = get_enrolled_video_payload(request, video_id)
+    if isinstance(video, Response):
+        return video
+
+    url = video['data'][field]
+    name = media.storage_name(url)
+    if name is None:
+        if url:
+            return HttpResponseRedirect(url)  # Hosted elsewhere
+        return Response({"error": "No media available."}, status=status.HTTP_404_NOT_FOUND)
+    return serve_media(request, name)
+
+
+@api_view(['GET'])
+@authentication_classes([*api_settings.DEFAULT_AUTHENTICATION_CLASSES, QueryParamJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def stream_video(request, video_id):
+    """Video file with Range, ETag and Last-Modified support, for seeking players."""
+    return serve_video_media(request, video_id, 'video_url')
+
+
+@api_view(['GET'])
+@authentication_classes([*api_settings.DEFAULT_AUTHENTICATION_CLASSES, QueryParamJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def get_video_poster(request, video_id):
+    """Poster image of a video."""
+    return serve_video_media(request, video_id, 'poster_url')
+
+
+@api_view(['GET'])
+@authentication_classes([*api_settings.DEFAULT_AUTHENTICATION_CLASSES, QueryParamJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def get_video_asset(request, video_id, path):
+    """
+    A file generated for a video (HLS playlists and segments, thumbnail sprites and
+    their WebVTT index), for users enrolled in its course. Playlists and the index
+    link to their files relatively, so those resolve to this view too.
+    """
+    video = get_enrolled_video_payload(request, video_id)
+    if isinstance(video, Response):
+        return video
+    name = media.asset_name(video_id, path)
+    if name is None:
+        return Response({"error": "Media file not found."}, status=status.HTTP_404_NOT_FOUND)
+    return serve_media(request, name)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@enrollment_required
 def get_course_watch_history(request, course_id):
     """Handles retrieving watch history for all videos in a particular course."""
-    # Validate the course UUID
-    course_uuid = validate_uuid(course_id)
-    if not course_uuid:
-        return Response({"error": "Invalid course ID format."}, status=status.HTTP_400_BAD_REQUEST)
-
+    user = request.user
     try:
-        course = Course.objects.get(id=course_uuid)
-        user = request.user
-
-        # Check if the user is enrolled in this course
-        if not Enrollment.objects.filter(user=user, course=course).exists():
-            return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+        course = get_course_payload(course_id)
 
         # Retrieve all videos for the course
-        videos = Video.objects.filter(course=course)
+        videos = Video.objects.filter(course_id=course_id)
 
         # Fetch the watch history for each video for the current user
-        watch_histories = WatchHistory.objects.filter(user=user, video__in=videos)
+        watch_histories = WatchHistory.objects.filter(user_id=user.id, video__in=videos).select_related('video', 'course')
 
         # If no watch history exists, create default data for each video
+        # (both branches page by video order and video id, so cursors stay valid across them)
         if not watch_histories.exists():
+            paginator = VideoPagination()
+            page = paginator.paginate_queryset(videos, request)
             default_data = [
                 {
                     "id": None,
                     "user": user.id,
                     "video": video.id,
-                    "course": course.id,
+                    "course": course['id'],
                     "last_watched_time": 0,  # Default time for new entries
                     "watched_status": False,     # Default status for unwatched videos
                     "video_title": video.title,
-                    "course_title": course.title,
+                    "course_title": course['title'],
                 }
-                for video in videos
+                for video in (page if page is not None else videos)
             ]
+            if page is not None:
+                return paginator.get_paginated_response(default_data)
             return Response(default_data, status=status.HTTP_200_OK)
 
         # Serialize the existing watch histories
-        watch_history_serializer = WatchHistorySerializer(watch_histories, many=True)
-        return Response(watch_history_serializer.data, status=status.HTTP_200_OK)
+        data = fast_json.list_data(watch_histories, WatchHistorySerializer, WatchHistoryPagination(), request)
+        return Response(data, status=status.HTTP_200_OK)
 
     except Course.DoesNotExist:
         return Response({"error": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -261,31 +544,34 @@ def get_video_watch_history(request, video_id):
         return Response({"error": "Invalid video ID format."}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Retrieve the video by ID
-        video = Video.objects.get(id=video_uuid)
+        # Retrieve the video (cached) to find its course
+        video = get_video_payload(video_uuid)
         user = request.user
 
         # Check if the user is enrolled in the course related to the video
-        if not Enrollment.objects.filter(user=user, course=video.course).exists():
+        if not is_enrolled(user, video['course']):
             return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
 
         # Retrieve the watch history for the video and user
         try:
-            watch_history = WatchHistory.objects.get(user=user, video=video)
-            serializer = WatchHistorySerializer(watch_history)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            watch_history = WatchHistory.objects.select_related('video', 'course').get(user_id=user.id, video_id=video_uuid)
+            data = WatchHistorySerializer(watch_history).data
         except WatchHistory.DoesNotExist:
-            return Response(
-                {
-                    "id": None,
-                    "user": user.id,
-                    "video": video.id,
-                    "course": video.course.id,
-                    "last_watched_time": 0,  # Default to 0 if no history exists
-                    "watched_status": False  # Default to unwatched
-                },
-                status=status.HTTP_200_OK
-            )
+            data = {
+                "id": None,
+                "user": user.id,
+                "video": video['data']['id'],
+                "course": video['course'],
+                "last_watched_time": 0,  # Default to 0 if no history exists
+                "watched_status": False  # Default to unwatched
+            }
+
+        # Prefer a heartbeat that is still waiting in this process's write buffer
+        pending = watch_history_buffer.get(user.id, video_uuid)
+        if pending:
+            data["last_watched_time"] = pending.last_watched_time
+            data["watched_status"] = pending.watched_status
+        return Response(data, status=status.HTTP_200_OK)
     except Video.DoesNotExist:
         return Response({"error": "Video not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -300,12 +586,12 @@ def update_watch_history(request, video_id):
         return Response({"error": "Invalid video ID format."}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Retrieve the video by ID
-        video = Video.objects.get(id=video_uuid)
+        # Retrieve the video (with its course, used by the serializer) by ID
+        video = Video.objects.select_related('course').get(id=video_uuid)
         user = request.user
 
         # Check if the user is enrolled in the course related to the video
-        if not Enrollment.objects.filter(user=user, course=video.course).exists():
+        if not is_enrolled(user, video.course_id):
             return Response({"error": "User not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
 
         # Get last watched time and watched_status from request data
@@ -316,22 +602,8 @@ def update_watch_history(request, video_id):
         if last_watched_time is None:
             return Response({"error": "Last watched time is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Retrieve or create the watch history record for the user and video
-        watch_history, created = WatchHistory.objects.get_or_create(
-            user=user,
-            video=video,
-            defaults={
-                'course': video.course,
-                'last_watched_time': last_watched_time,  # Initialize with provided last_watched_time
-                'watched_status': watched_status        # Initialize with provided or default watched_status
-            }
-        )
-
-        # Update the watch history record
-        watch_history.last_watched_time = last_watched_time
-        watch_history.watched_status = watched_status
-        watch_history.course = video.course  # Ensure the course is always correctly set
-        watch_history.save()
+        # Create or update the record and the enrollment counters, with the row locked
+        watch_history = save_watch_history(user.id, video, last_watched_time, watched_status)
 
         # Serialize the updated watch history data
         serializer = WatchHistorySerializer(watch_history)
@@ -341,6 +613,26 @@ def update_watch_history(request, video_id):
         return Response({"error": "Video not found."}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def update_watch_history_batch(request):
+    """Accepts many watch-progress heartbeats and buffers them for a bulk write."""
+    try:
+        heartbeats, video_ids = read_batch(request.data.get('heartbeats'))
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Resolve the course of every video in the batch with a single query
+    user = request.user
+    video_courses = {
+        str(video_id): str(course_id)
+        for video_id, course_id in Video.objects.filter(id__in=video_ids).values_list('id', 'course_id')
+    }
+    accepted, rejected = sort_batch(heartbeats, video_courses, get_enrolled_course_ids(user.id))
+    for video_uuid, heartbeat in accepted:
+        watch_history_buffer.add(user.id, video_uuid, heartbeat)
+    return Response({"accepted": len(accepted), "rejected": rejected}, status=status.HTTP_202_ACCEPTED)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def enroll_in_course(request):
@@ -363,7 +655,7 @@ def enroll_in_course(request):
         return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
 
     # Enroll user in the course
-    enrollment, created = Enrollment.objects.get_or_create(user=user, course=course)
+    enrollment, created = Enrollment.objects.get_or_create(user_id=user.id, course=course)
     if created:
         return Response({"message": f"Successfully enrolled in {course.title}"}, status=status.HTTP_201_CREATED)
     else:
@@ -387,7 +679,7 @@ def update_enrollment_status(request):
         return Response({"error": "Course ID is required"}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        enrollment = Enrollment.objects.get(user=user, course_id=course_uuid)
+        enrollment = Enrollment.objects.get(user_id=user.id, course_id=course_uuid)
     except Enrollment.DoesNotExist:
         return Response({"error": "Enrollment not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -412,22 +704,71 @@ def update_enrollment_status(request):
         "completion_percentage": enrollment.completion_percentage
     }, status=status.HTTP_200_OK)
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_cache_stats(request):
+    """Hit, miss and invalidation counters of the course cache in this process."""
+    return Response(cache.get_stats(), status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_data(request, dataset):
+    """
+    Stream every `dataset` row (watch-history or enrollments) as NDJSON or CSV
+    (`output`), optionally only those updated after the `since` watermark. The
+    X-Export-Watermark header is the `since` of the next incremental export; it
+    lags EXPORT_WATERMARK_LAG seconds behind, and rows may repeat across exports
+    (dedupe by id).
+    """
+    if dataset not in exports.DATASETS:
+        return Response({"error": "Unknown export."}, status=status.HTTP_404_NOT_FOUND)
+    output = request.query_params.get('output', 'ndjson')
+    if output not in exports.FORMATS:
+        return Response({"error": "output must be ndjson or csv."}, status=status.HTTP_400_BAD_REQUEST)
+    since = request.query_params.get('since')
+    try:
+        since = exports.parse_watermark(since) if since else None
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    until = exports.watermark()
+    response = StreamingHttpResponse(exports.blocks(exports.lines(dataset, output, since, until)),
+                                     content_type=exports.FORMATS[output])
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{output}"'
+    response['X-Export-Watermark'] = exports.format_watermark(until)
+    return response
+
 @api_view(['GET'])
 def getRoutes(request):
     """Get available API routes.""" 
     routes = [
         {'GET': '/all-courses/'},
         {'GET': '/course-list/'},
+        {'GET': '/search/courses/'},
+        {'GET': '/search/videos/'},
         {'GET': '/course-details/<uuid:course_id>/'},
         {'GET': '/course-videos/<uuid:course_id>/'},
         {'GET': '/course-content/<uuid:course_id>/watch-history/'},
         {'GET': '/course/<uuid:course_id>/last-watched/'},
         {'POST': '/course/<uuid:course_id>/last-watched/update/'},
+        {'GET': '/course/<uuid:course_id>/progress/'},
+        {'GET': '/course/<uuid:course_id>/online/'},
+        {'GET': '/dashboard/'},
         {'GET': '/videos/<uuid:video_id>/'},
         {'GET': '/videos/<uuid:video_id>/watch-history/'},
+        {'GET': '/videos/<uuid:video_id>/stream/'},
+        {'GET': '/videos/<uuid:video_id>/poster/'},
         {'POST': '/videos/<uuid:video_id>/watch-history/update/'},
+        {'POST': '/videos/watch-history/batch/'},
         {'POST': '/videos/upload/'},
+        {'GET': '/videos/ingestion/<uuid:job_id>/'},
+        {'POST': '/videos/uploads/'},
+        {'GET': '/videos/uploads/<uuid:session_id>/'},
+        {'PUT': '/videos/uploads/<uuid:session_id>/chunks/<int:index>/'},
+        {'POST': '/videos/uploads/<uuid:session_id>/finalize/'},
         {'POST': '/enroll/'},
         {'POST': '/enrollment/update/'},
+        {'GET': '/cache/stats/'},
+        {'GET': '/export/<dataset>/'},
     ]
     return Response(routes)